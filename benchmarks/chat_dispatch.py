@@ -0,0 +1,106 @@
+"""
+Compares per-message dispatch cost of scanning every Command regex against the CommandIndex.
+
+Usage:
+    python benchmarks/chat_dispatch.py [messages]
+    python benchmarks/chat_dispatch.py --check [iterations]  # compare CommandIndex with the regexes on random input
+"""
+from pytwitchinteract.chat import Command
+from pytwitchinteract.chat.dispatch import CommandIndex
+
+import random
+import sys
+import time
+
+
+MESSAGES = [
+    "hello everyone, how is the stream going today",
+    "!command5 with some arguments",
+    "that play was insane !command42 PogChamp",
+    "!unknown command here",
+    "just chatting about nothing in particular really"
+]
+
+
+def bench_scan(commands, messages):
+    matched = 0
+    for content in messages:
+        for command in commands:
+            if len(command.matcher.findall(content)) > 0:
+                matched += 1
+    return matched
+
+
+def bench_index(index, messages):
+    matched = 0
+    for content in messages:
+        matched += len(index.match(content))
+    return matched
+
+
+PREFIXES = ['!', '?', '', '!!', '.']
+NAMES = ['a', 'b', 'ping', 'Ping', 'a b', 'x.y', '']
+WHITESPACE = [' ', '  ', '\t', ' \t ']
+
+
+def check(iterations, seed=0):
+    """
+    Compare CommandIndex.match with the regex of every command on random commands and messages
+
+    :return: Amount of mismatches, each is printed
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+
+    for _ in range(iterations):
+        commands = []
+        index = CommandIndex()
+
+        for _ in range(rng.randint(1, 6)):
+            # Duplicate aliases are generated on purpose
+            aliases = [rng.choice(NAMES) for _ in range(rng.randint(1, 3))]
+            command = Command(rng.choice(PREFIXES), aliases, rng.random() < 0.5, None)
+            commands.append(command)
+            index.add(command)
+
+        words = [rng.choice(PREFIXES) + rng.choice(NAMES) if rng.random() < 0.6 else rng.choice(['hi', 'pog', '!', 'ab']) for _ in range(rng.randint(0, 6))]
+        content = rng.choice(['', ' ']) + ''.join(word + rng.choice(WHITESPACE) for word in words).rstrip(rng.choice(['', ' ']))
+
+        expected = [(command, command.matcher.findall(content)) for command in commands]
+        expected = [(command, matches) for command, matches in expected if len(matches) > 0]
+        actual = index.match(content)
+
+        if actual != expected:
+            mismatches += 1
+            print("Mismatch for {!r}: {} != {}".format(
+                content, [(c.prefix, c.command, c.beginning, m) for c, m in actual], [(c.prefix, c.command, c.beginning, m) for c, m in expected]
+            ))
+
+    return mismatches
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--check':
+        iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        mismatches = check(iterations)
+        print("{:,} random cases, {} mismatches".format(iterations, mismatches))
+        sys.exit(1 if mismatches else 0)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    messages = (MESSAGES * (count // len(MESSAGES) + 1))[:count]
+
+    for size in (10, 100, 1000):
+        commands = [Command('!', 'command{}'.format(i), i % 2 == 0, None) for i in range(size)]
+        index = CommandIndex()
+        for command in commands:
+            index.add(command)
+
+        for name, bench, target in (('regex scan', bench_scan, commands), ('CommandIndex', bench_index, index)):
+            start = time.perf_counter()
+            matched = bench(target, messages)
+            elapsed = time.perf_counter() - start
+            print("{:>5} commands {:<13} {:>12,.0f} messages/sec ({} matches)".format(size, name, count / elapsed, matched))
+
+
+if __name__ == '__main__':
+    main()
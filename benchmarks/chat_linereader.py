@@ -0,0 +1,67 @@
+"""
+Compares lines/sec of the buffered LineReader against the previous recv(1) loop.
+
+Usage: python benchmarks/chat_linereader.py [lines]
+"""
+from pytwitchinteract.chat import LineReader
+
+import sys
+import time
+
+
+class FakeSocket:
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def recv(self, size):
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return bytes(chunk)
+
+    def recv_into(self, buffer):
+        chunk = self.data[self.position:self.position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+
+def build_stream(lines):
+    line = ":someone!someone@someone.tmi.twitch.tv PRIVMSG #channel :hello there, this is a chat message !memes\r\n"
+    return (line * lines).encode('UTF-8')
+
+
+def bench_recv_one(data, lines):
+    connection = FakeSocket(data)
+    received = 0
+    line = ""
+    while received < lines:
+        line += connection.recv(1).decode('UTF-8', 'replace')
+        if line[-2:] == '\r\n':
+            received += 1
+            line = ""
+    return received
+
+
+def bench_line_reader(data, lines):
+    reader = LineReader(FakeSocket(data))
+    received = 0
+    while received < lines:
+        received += len(reader.read_lines())
+    return received
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    data = build_stream(lines)
+
+    for name, bench in (('recv(1) loop', bench_recv_one), ('LineReader', bench_line_reader)):
+        start = time.perf_counter()
+        received = bench(data, lines)
+        elapsed = time.perf_counter() - start
+        print("{:<14} {:>12,.0f} lines/sec ({} lines in {:.3f}s)".format(name, received / elapsed, received, elapsed))
+
+
+if __name__ == '__main__':
+    main()
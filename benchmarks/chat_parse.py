@@ -0,0 +1,113 @@
+"""
+Compares lines/sec of the hand-written IRC line parser against the previous regex based Message.
+
+The previous parser rejected lines with IRCv3 tags, so it is measured on the same lines with the tags stripped.
+Lines are read from a file of recorded chat (one raw line per line) if given, otherwise synthesized.
+
+Usage: python benchmarks/chat_parse.py [lines] [recorded.txt]
+"""
+from pytwitchinteract.chat import Message, MessageProcessException
+
+import random
+import re
+import sys
+import time
+
+
+MESSAGE_PATTERN = re.compile(r"^:([^\n\s]+?)\s([^\n\s]+?)\s([^\n\s]+?)\s:([^\n]+?)$")
+SENDER_PATTERN = re.compile(r"^(.+?)!")
+
+CONTENTS = [
+    "hello everyone, how is the stream going today",
+    "!memes",
+    "that play was insane PogChamp PogChamp",
+    "LUL",
+    "can you play that song again? it was really good, thanks for the stream and have a nice day"
+]
+
+
+class RegexMessage:
+
+    def __init__(self, chat, message):
+        self.chat = chat
+        data = MESSAGE_PATTERN.search(message)
+
+        if data is None:
+            raise MessageProcessException(message)
+
+        self.sender = data.group(1)
+        self.type = data.group(2)
+        self.target = data.group(3)
+        self.content = data.group(4)
+
+        if self.content[-1] == '\r':
+            self.content = self.content[:-1]
+
+        user = SENDER_PATTERN.search(self.sender)
+
+        if user is not None:
+            self.sender = user.group(1)
+
+
+def synthesize(count):
+    generator = random.Random(0)
+    lines = []
+
+    for i in range(count):
+        user = "user{}".format(generator.randrange(5000))
+        tags = "@badge-info=subscriber/{0};badges=subscriber/{0},premium/1;color=#1E90FF;display-name={1};emotes=;" \
+               "first-msg=0;flags=;id=5f7a0c5e-{2:04x};mod=0;room-id=12345;subscriber=1;tmi-sent-ts=16{2:011d};" \
+               "turbo=0;user-id={3};user-type=".format(generator.randrange(48), user, i % 65536, generator.randrange(10 ** 8))
+        lines.append("{} :{}!{}@{}.tmi.twitch.tv PRIVMSG #channel :{}".format(tags, user, user, user, generator.choice(CONTENTS)))
+
+    return lines
+
+
+def strip_tags(line):
+    return line.split(' ', 1)[1] if line.startswith('@') else line
+
+
+def bench(parser, lines):
+    parsed = 0
+
+    for line in lines:
+        parser(None, line)
+        parsed += 1
+
+    return parsed
+
+
+def bench_with_tags(lines):
+    users = set()
+
+    for line in lines:
+        users.add(Message(None, line).user_id)
+
+    return len(lines)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], encoding='UTF-8') as f:
+            lines = [line.rstrip('\r\n') for line in f if line.strip()]
+
+        lines = (lines * (count // len(lines) + 1))[:count]
+    else:
+        lines = synthesize(count)
+
+    untagged = [strip_tags(line) for line in lines]
+
+    for name, run in (('regex, untagged', lambda: bench(RegexMessage, untagged)),
+                      ('parser, untagged', lambda: bench(Message, untagged)),
+                      ('parser, tagged', lambda: bench(Message, lines)),
+                      ('parser, tagged + user_id', lambda: bench_with_tags(lines))):
+        start = time.perf_counter()
+        parsed = run()
+        elapsed = time.perf_counter() - start
+        print("{:<26} {:>12,.0f} lines/sec ({:,} lines)".format(name, parsed / elapsed, parsed))
+
+
+if __name__ == '__main__':
+    main()
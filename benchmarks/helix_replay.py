@@ -0,0 +1,264 @@
+"""
+Offline benchmark of the Helix client: requests/sec, p50/p99 latency and peak allocated memory
+of every endpoint method and of PaginatedResponse walks, served by a ReplayTransport.
+
+Without --recording, synthetic Helix responses are generated and recorded through a RecordingTransport first.
+Every workload is warmed up, then measured in --repeats rounds of at least --min-time seconds each,
+interleaved with the other workloads. calls_per_sec is the median round, best_calls_per_sec the fastest.
+
+Each round alternates with a fixed pure Python calibration loop. relative_speed is the median of the
+workload's rounds divided by their calibration, which cancels out the machine getting faster or slower
+during or between runs. With --output the results are written as JSON, and with --baseline the run fails
+(exit code 1) if the relative_speed of any workload dropped below the baseline's by more than --tolerance.
+
+Usage: python benchmarks/helix_replay.py [--min-time 0.2] [--repeats 5] [--warmup 0.1] [--latency 0] [--recording FILE]
+                                         [--output FILE] [--baseline FILE] [--tolerance 0.1]
+"""
+from pytwitchinteract import Twitch
+from pytwitchinteract.utils import BufferedResponse, RecordingTransport, ReplayTransport
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+
+
+PAGES = 5
+PAGE_SIZE = 100
+
+# Alternations of calibration and workload per round
+SLICES = 5
+
+ROWS = {
+    '/helix/games': lambda i: {'id': str(i), 'name': 'Game {}'.format(i), 'box_art_url': 'https://example.com/{}.jpg'.format(i)},
+    '/helix/users': lambda i: {'id': str(i), 'login': 'user{}'.format(i), 'display_name': 'User{}'.format(i), 'type': '', 'broadcaster_type': '',
+                               'description': 'Just a streamer', 'profile_image_url': '', 'offline_image_url': '', 'view_count': i * 10},
+    '/helix/streams': lambda i: {'id': str(i), 'user_id': str(1000 + i), 'game_id': str(i % 20), 'community_ids': [], 'type': 'live',
+                                 'title': 'Stream number {}'.format(i), 'viewer_count': 10000 - i, 'started_at': '2018-01-01T00:00:00Z',
+                                 'language': 'en', 'thumbnail_url': 'https://example.com/{width}x{height}.jpg'},
+    '/helix/streams/metadata': lambda i: {'user_id': str(1000 + i), 'game_id': str(i % 20), 'overwatch': None, 'hearthstone': None},
+    '/helix/users/follows': lambda i: {'from_id': str(i), 'to_id': '5', 'followed_at': '2018-01-01T00:00:00Z'},
+    '/helix/videos': lambda i: {'id': str(i), 'user_id': '5', 'title': 'Video {}'.format(i), 'description': '', 'created_at': '2018-01-01T00:00:00Z',
+                                'published_at': '2018-01-01T00:00:00Z', 'thumbnail_url': '', 'view_count': i, 'language': 'en'}
+}
+
+WORKLOADS = [
+    ('get_games', lambda twitch: twitch.get_games(id=[str(i) for i in range(10)])),
+    ('get_users', lambda twitch: twitch.get_users(login=['user{}'.format(i) for i in range(10)])),
+    ('get_streams', lambda twitch: twitch.get_streams(amount=PAGE_SIZE).data),
+    ('get_streams_metadata', lambda twitch: twitch.get_streams_metadata(amount=PAGE_SIZE).data),
+    ('get_users_follows', lambda twitch: twitch.get_users_follows(to_id='5', amount=PAGE_SIZE).data),
+    ('get_videos', lambda twitch: twitch.get_videos(user_id='5', amount=PAGE_SIZE).data),
+    ('walk streams', lambda twitch: sum(1 for _ in twitch.get_streams(amount=PAGE_SIZE).iterate())),
+    ('walk streams, prefetch', lambda twitch: sum(1 for _ in twitch.get_streams(amount=PAGE_SIZE).iterate(prefetch=True))),
+    ('walk streams, columns', lambda twitch: len(twitch.get_streams(amount=PAGE_SIZE).to_columns()))
+]
+
+
+class SyntheticTransport:
+    """
+    Answers like Helix, with PAGES pages of PAGE_SIZE rows for paginated endpoints
+    """
+
+    size = 10
+
+    def request(self, method, url, body=None, headers=None):
+        parsed = urllib.parse.urlparse(url)
+        query = urllib.parse.parse_qs(parsed.query)
+        row = ROWS[parsed.path]
+
+        ids = query.get('id') or query.get('login')
+
+        if ids is not None and parsed.path in ('/helix/games', '/helix/users'):
+            rows = [row(index) for index in range(len(ids))]
+            pagination = {}
+        else:
+            page = int(query.get('after', ['0'])[0])
+            rows = [row(page * PAGE_SIZE + index) for index in range(PAGE_SIZE)] if page < PAGES else []
+            pagination = {'cursor': str(page + 1)} if page < PAGES else {}
+
+        headers = http.client.HTTPMessage()
+        headers['Content-Type'] = 'application/json'
+        headers['Ratelimit-Limit'] = '800'
+        headers['Ratelimit-Remaining'] = '799'
+
+        return BufferedResponse(200, 'OK', headers, json.dumps({'data': rows, 'pagination': pagination}).encode('UTF-8'))
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def record(path):
+    twitch = Twitch('token', transport=RecordingTransport(SyntheticTransport(), path), rate_limiter=False)
+
+    for _, workload in WORKLOADS:
+        workload(twitch)
+
+    twitch.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_for(twitch, workload, min_time, latencies=None):
+    """
+    Call the workload until at least min_time seconds passed
+
+    :return: Tuple of calls, requests and elapsed seconds
+    """
+    transport = twitch.pool
+    requests = transport.requests
+    calls = 0
+
+    start = time.perf_counter()
+    elapsed = 0.0
+
+    while calls == 0 or elapsed < min_time:
+        call_start = time.perf_counter()
+        workload(twitch)
+        end = time.perf_counter()
+
+        if latencies is not None:
+            latencies.append(end - call_start)
+
+        calls += 1
+        elapsed = end - start
+
+    return calls, transport.requests - requests, elapsed
+
+
+CALIBRATION_DOCUMENT = json.dumps({'data': [ROWS['/helix/streams'](i) for i in range(20)], 'pagination': {'cursor': '1'}})
+
+
+def calibration(_):
+    # Decoding and copying rows, like the client does, but independent of its code
+    return [dict(row) for row in json.loads(CALIBRATION_DOCUMENT)['data']]
+
+
+def peak_memory(twitch, workload):
+    # Separate pass, tracing slows everything down
+    tracemalloc.start()
+    peaks = []
+
+    for _ in range(20):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        workload(twitch)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+
+    tracemalloc.stop()
+
+    return max(peaks)
+
+
+def bench(twitch, workloads, min_time, repeats, warmup):
+    """
+    :return: Dictionary of workload name to results
+    """
+    for _, workload in workloads:
+        # Fills caches and lets allocations settle before measuring
+        run_for(twitch, workload, warmup)
+
+    rounds = {name: [] for name, _ in workloads}
+    relative = {name: [] for name, _ in workloads}
+    latencies = {name: [] for name, _ in workloads}
+
+    # Rounds of the workloads are interleaved, so a slow stretch of the machine affects all of them alike
+    for _ in range(repeats):
+        for name, workload in workloads:
+            measured = [0, 0, 0.0]
+            calibrated = [0, 0.0]
+
+            # Short alternating slices keep the calibration close in time to the measurement
+            for _ in range(SLICES):
+                calls, _, elapsed = run_for(twitch, calibration, min_time / SLICES / 2)
+                calibrated[0] += calls
+                calibrated[1] += elapsed
+
+                calls, requests, elapsed = run_for(twitch, workload, min_time / SLICES, latencies[name])
+                measured[0] += calls
+                measured[1] += requests
+                measured[2] += elapsed
+
+            rounds[name].append(tuple(measured))
+            relative[name].append((measured[0] / measured[2]) / (calibrated[0] / calibrated[1]))
+
+    results = {}
+
+    for name, workload in workloads:
+        calls_per_sec = sorted(calls / elapsed for calls, _, elapsed in rounds[name])
+        requests_per_sec = sorted(requests / elapsed for _, requests, elapsed in rounds[name])
+
+        results[name] = {
+            'requests_per_sec': statistics.median(requests_per_sec),
+            'calls_per_sec': statistics.median(calls_per_sec),
+            'best_calls_per_sec': calls_per_sec[-1],
+            'relative_speed': statistics.median(relative[name]),
+            'rounds': repeats,
+            'p50_ms': percentile(latencies[name], 0.5) * 1000,
+            'p99_ms': percentile(latencies[name], 0.99) * 1000,
+            'peak_kib': peak_memory(twitch, workload) / 1024
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--recording')
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    recording = args.recording
+
+    if recording is None:
+        recording = os.path.join(tempfile.mkdtemp(), 'helix.jsonl')
+        record(recording)
+
+    twitch = Twitch('token', transport=ReplayTransport(recording, latency=args.latency), rate_limiter=False)
+    results = bench(twitch, WORKLOADS, args.min_time, args.repeats, args.warmup)
+
+    print("{:<24} {:>10} {:>10} {:>10} {:>9} {:>9} {:>10}".format('workload', 'req/s', 'calls/s', 'best', 'p50 ms', 'p99 ms', 'peak KiB'))
+
+    for name, result in results.items():
+        print("{:<24} {:>10,.0f} {:>10,.0f} {:>10,.0f} {:>9.3f} {:>9.3f} {:>10,.1f}".format(
+            name, result['requests_per_sec'], result['calls_per_sec'], result['best_calls_per_sec'], result['p50_ms'], result['p99_ms'], result['peak_kib']))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = [name for name, result in results.items()
+                       if 'relative_speed' in baseline.get(name, {}) and result['relative_speed'] < baseline[name]['relative_speed'] * (1 - args.tolerance)]
+
+        for name in regressions:
+            print("Regression: {} relative speed {:.4f}, baseline {:.4f} ({:,.0f} calls/sec, baseline {:,.0f})".format(
+                name, results[name]['relative_speed'], baseline[name]['relative_speed'], results[name]['calls_per_sec'], baseline[name]['calls_per_sec']))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
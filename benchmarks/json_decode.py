@@ -0,0 +1,61 @@
+"""
+Compares decoding and mapping Helix /streams pages of 20 and 100 rows
+with json.loads and the installed fast decoder (orjson/ujson).
+
+Usage: python benchmarks/json_decode.py [iterations]
+"""
+from pytwitchinteract import Twitch
+from pytwitchinteract.models import Stream
+
+import json
+import sys
+import time
+
+
+def build_payload(rows):
+    return json.dumps({
+        'data': [{
+            'id': str(26007494656 + i),
+            'user_id': str(23161357 + i),
+            'game_id': '488552',
+            'community_ids': ['848d95be-90b3-44a5-b143-6e373754c382', 'fd0eab99-832a-4d7e-8cc0-04d73deb2e54'],
+            'type': 'live',
+            'title': 'Ranked grind with viewers, !commands for info #{}'.format(i),
+            'viewer_count': 78365 - i * 13,
+            'started_at': '2017-08-14T16:08:32Z',
+            'language': 'en',
+            'thumbnail_url': 'https://static-cdn.jtvnw.net/previews-ttv/live_user_lirik-{width}x{height}.jpg'
+        } for i in range(rows)],
+        'pagination': {'cursor': 'eyJiIjpudWxsLCJhIjp7Ik9mZnNldCI6MjB9fQ=='}
+    }).encode('UTF-8')
+
+
+def bench(twitch, payload, iterations):
+    decode = twitch.decoder
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        twitch.process_array(decode(payload)['data'], Stream)
+
+    return time.perf_counter() - start
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    decoders = [('json', Twitch(decoder=json.loads))]
+
+    fast = Twitch()
+    if fast.decoder is not json.loads:
+        decoders.append((fast.decoder.__module__, fast))
+
+    for rows in (20, 100):
+        payload = build_payload(rows)
+
+        for name, twitch in decoders:
+            elapsed = bench(twitch, payload, iterations)
+            print("{:>3} rows {:<8} {:>10,.0f} pages/sec {:>12,.0f} rows/sec".format(rows, name, iterations / elapsed, iterations * rows / elapsed))
+
+
+if __name__ == '__main__':
+    main()
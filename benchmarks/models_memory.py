@@ -0,0 +1,60 @@
+"""
+Compares the memory used by Stream objects with and without __slots__.
+
+Usage: python benchmarks/models_memory.py [objects]
+"""
+from pytwitchinteract.models import Stream
+
+import sys
+import tracemalloc
+
+
+class DictStream:
+    """
+    Stream as it was before __slots__, with a per-instance __dict__
+    """
+
+    def __init__(self, stream_id, user_id, game_id, community_ids, stream_type, title, viewer_count, started_at, language, thumbnail_url, twitch):
+        self.id = stream_id
+        self.user_id = user_id
+        self.game_id = game_id
+        self.community_ids = community_ids
+        self.type = stream_type
+        self.title = title
+        self.viewer_count = viewer_count
+        self.started_at = started_at
+        self.language = language
+        self.thumbnail_url = thumbnail_url
+        self.twitch = twitch
+
+
+def measure(mapping, rows):
+    tracemalloc.start()
+    objects = [mapping(*row) for row in rows]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    # Field values are shared between both runs, so only the object overhead is measured
+    community_ids = []
+    rows = [
+        (str(i), str(i * 7), '488552', community_ids, 'live', 'title', i, '2018-01-01T00:00:00Z', 'en', 'url', None)
+        for i in range(count)
+    ]
+
+    before = measure(DictStream, rows)
+    after = measure(Stream, rows)
+
+    print("{:,} Stream objects".format(count))
+    print("  __dict__:  {:>12,} bytes ({:.0f} bytes/object)".format(before, before / count))
+    print("  __slots__: {:>12,} bytes ({:.0f} bytes/object)".format(after, after / count))
+    print("  saved:     {:.1%}".format(1 - after / before))
+
+
+if __name__ == '__main__':
+    main()
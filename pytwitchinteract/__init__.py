@@ -1 +1,4 @@
 from .twitch import Twitch
+from .asynctwitch import AsyncTwitch
+from .watcher import StreamWatcher
+from .chat import TwitchChat, AsyncTwitchChat, MultiTwitchChat
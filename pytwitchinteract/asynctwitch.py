@@ -0,0 +1,72 @@
+from pytwitchinteract.twitch import Twitch
+from pytwitchinteract.utils import AsyncConnectionPool, AsyncFanOut, AsyncLookupBatch
+
+import asyncio
+import time
+
+
+class AsyncTwitch(Twitch):
+    """
+    asyncio counterpart of Twitch.
+    Every endpoint method, model helper and PaginatedResponse.next()/previous() returns a coroutine.
+    """
+
+    def _create_pool(self, host, secure, size, timeout):
+        return AsyncConnectionPool(host, secure=secure, size=size, timeout=timeout)
+
+    def _create_batch(self):
+        return AsyncLookupBatch(self)
+
+    def _create_fan_out(self, max_workers):
+        return AsyncFanOut(self, max_workers)
+
+    async def do_request(self, endpoint, method='GET', query=None, headers=None, body=None, priority=0):
+        """
+        Make a request to the Twitch API.
+        The rate limiter is polled without blocking the event loop, so priority is not applied.
+
+        :return: BufferedResponse
+        """
+        url, headers = self._prepare_request(endpoint, query, headers)
+        attempt = 0
+
+        while True:
+            start = time.perf_counter()
+
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.try_acquire()
+
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self.rate_limiter.try_acquire()
+
+            sent = time.perf_counter()
+            response = await self.pool.request(method, url, body, headers)
+
+            delay = self._handle_response(endpoint, response, attempt, sent - start, time.perf_counter() - sent)
+
+            if delay is None:
+                return response
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _request_data(self, endpoint, query, method):
+        return self._decode(await self.do_request(endpoint, method=method, query=query))
+
+    async def _then(self, result, callback):
+        return callback(await result)
+
+    async def _resolved(self, value):
+        return value
+
+    async def _lookup(self, method, ids):
+        found = {}
+
+        pages = await asyncio.gather(*[method(id=ids[start:start + 100]) for start in range(0, len(ids), 100)])
+
+        for page in pages:
+            for item in page:
+                found[item.id] = item
+
+        return found
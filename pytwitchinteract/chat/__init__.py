@@ -1 +1,11 @@
 from .chat import TwitchChat
+from .asyncchat import AsyncTwitchChat
+from .multichat import MultiTwitchChat
+from .connection import ChatConnection, AuthenticationException
+from .linereader import LineReader
+from .message import Message, MessageProcessException, Command
+from .dispatch import CommandIndex
+from .workers import CallbackPool
+from .sendqueue import SendQueue
+from .sharded import ShardedTwitchChat, ShardMessage
+from .archive import ChatArchiver, ArchiveReader, ArchivedMessage, read_archive
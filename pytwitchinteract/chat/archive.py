@@ -0,0 +1,408 @@
+from collections import deque
+import gzip
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PTCA'
+VERSION = 1
+
+CODEC_NONE = 0
+CODEC_GZIP = 1
+CODEC_ZSTD = 2
+
+CODECS = {None: CODEC_NONE, 'gzip': CODEC_GZIP, 'zstd': CODEC_ZSTD}
+
+# Magic, version, codec
+FILE_HEADER = struct.Struct('<4sBB')
+
+# Length of the (compressed) block payload, amount of records in it
+BLOCK_HEADER = struct.Struct('<II')
+
+# Receive time, then the lengths of the UTF-8 type, sender, target, content and raw line following the header
+RECORD_HEADER = struct.Struct('<dHHHHH')
+
+FIELD_LIMIT = 0xFFFF
+
+EXTENSION = '.ptca'
+
+
+def _zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the zstandard package") from None
+
+
+def _field(value):
+    if value is None:
+        return b''
+
+    return value.encode('UTF-8')[:FIELD_LIMIT]
+
+
+class ArchivedMessage:
+
+    __slots__ = ('received_at', 'type', 'sender', 'target', 'content', 'raw')
+
+    def __init__(self, received_at, type, sender, target, content, raw):
+        """
+        :param received_at: time.time() the line was received
+        :param type: IRC command, e.g. PRIVMSG
+        :param sender: Login of the sender, or None
+        :param target: Channel, or None
+        :param content: Message text
+        :param raw: Raw IRC line, or None unless the archiver stored raw lines
+        """
+        self.received_at = received_at
+        self.type = type
+        self.sender = sender
+        self.target = target
+        self.content = content
+        self.raw = raw
+
+    def __repr__(self):
+        return 'ArchivedMessage({!r}, {!r}, {!r}, {!r}, {!r})'.format(self.received_at, self.type, self.sender, self.target, self.content)
+
+
+class ChatArchiver:
+
+    def __init__(self, directory, prefix='chat', types=('PRIVMSG',), compression='gzip', compression_level=3, include_raw=False,
+                 block_size=65536, flush_interval=1, fsync_interval=5, max_file_size=256 * 1024 * 1024, rotate_interval=3600,
+                 max_pending=100000):
+        """
+        Chat sink appending messages to compact, append-only archive files. Register it with chat.add_sink().
+
+        Files start with a header naming the codec, followed by blocks of length-prefixed records, each block
+        compressed on its own. A crash loses at most the block being written, which readers skip.
+        Messages are encoded and written on a background thread, the reading loop only queues them.
+
+        :param directory: Directory the archive files are created in
+        :param prefix: File name prefix, files are named <prefix>-<YYYYmmdd-HHMMSS>-<sequence>.ptca
+        :param types: IRC commands to archive, or None for every line
+        :param compression: "gzip", "zstd" (requires zstandard) or None
+        :param compression_level: Compression level of the codec
+        :param include_raw: Also store the raw line, including the IRCv3 tags
+        :param block_size: Uncompressed bytes after which a block is written
+        :param flush_interval: Maximum seconds a message is held in memory before its block is written
+        :param fsync_interval: Seconds between fsyncs, 0 syncs after every block
+        :param max_file_size: Bytes after which a new file is started
+        :param rotate_interval: Seconds after which a new file is started
+        :param max_pending: Maximum amount of queued messages, further messages (and messages after close()) are dropped
+        """
+        if compression not in CODECS:
+            raise ValueError("Unknown compression {}, expected one of {}".format(compression, list(CODECS)))
+
+        self.directory = directory
+        self.prefix = prefix
+        self.types = frozenset(types) if types is not None else None
+        self.compression = compression
+        self.compression_level = compression_level
+        self.include_raw = include_raw
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_file_size = max_file_size
+        self.rotate_interval = rotate_interval
+        self.max_pending = max_pending
+
+        self.archived = 0
+        self.dropped = 0
+        self.blocks = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.files = []
+
+        self.__compressor = None
+
+        if compression == 'zstd':
+            self.__compressor = _zstandard().ZstdCompressor(level=compression_level)
+
+        self.__pending = deque()
+        self.__condition = threading.Condition(threading.Lock())
+        self.__thread = None
+        self.__closed = False
+
+        self.__file = None
+        self.__file_size = 0
+        self.__opened_at = 0.0
+        self.__synced_at = 0.0
+        self.__sequence = 0
+
+        self.__block = bytearray()
+        self.__block_records = 0
+        self.__block_started = 0.0
+
+    def __call__(self, message):
+        """
+        Queue a parsed Message
+        """
+        if self.types is not None and message.type not in self.types:
+            return
+
+        with self.__condition:
+            if self.__closed or len(self.__pending) >= self.max_pending:
+                self.dropped += 1
+                return
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+
+            self.__pending.append((
+                message.received_at or time.time(), message.type, message.sender, message.target, message.content,
+                message.raw if self.include_raw else None
+            ))
+
+            if len(self.__pending) == 1:
+                self.__condition.notify()
+
+    def __encode(self, entry):
+        received_at, type, sender, target, content, raw = entry
+        fields = (_field(type), _field(sender), _field(target), _field(content), _field(raw))
+
+        self.__block += RECORD_HEADER.pack(received_at, *(len(field) for field in fields))
+
+        for field in fields:
+            self.__block += field
+
+    def __compress(self, data):
+        if self.compression == 'gzip':
+            return gzip.compress(data, self.compression_level, mtime=0)
+
+        if self.compression == 'zstd':
+            return self.__compressor.compress(data)
+
+        return bytes(data)
+
+    def __open(self, now):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+
+        while True:
+            path = os.path.join(self.directory, '{}-{}-{:04d}{}'.format(self.prefix, stamp, self.__sequence, EXTENSION))
+            self.__sequence += 1
+
+            try:
+                self.__file = open(path, 'xb')
+                break
+            except FileExistsError:
+                continue
+
+        self.__file.write(FILE_HEADER.pack(MAGIC, VERSION, CODECS[self.compression]))
+        self.__file_size = FILE_HEADER.size
+        self.__opened_at = now
+        self.files.append(path)
+
+    def __sync(self, now):
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__synced_at = now
+        self.fsyncs += 1
+
+    def __close_file(self, now):
+        if self.__file is not None:
+            self.__sync(now)
+            self.__file.close()
+            self.__file = None
+
+    def __write_block(self, now):
+        if self.__file is not None and (self.__file_size >= self.max_file_size or now - self.__opened_at >= self.rotate_interval):
+            self.__close_file(now)
+
+        if self.__file is None:
+            self.__open(now)
+
+        payload = self.__compress(self.__block)
+        self.__file.write(BLOCK_HEADER.pack(len(payload), self.__block_records))
+        self.__file.write(payload)
+
+        size = BLOCK_HEADER.size + len(payload)
+        self.__file_size += size
+        self.bytes_written += size
+        self.blocks += 1
+        self.archived += self.__block_records
+
+        self.__block = bytearray()
+        self.__block_records = 0
+
+        if self.fsync_interval == 0:
+            self.__sync(now)
+
+    def __run(self):
+        try:
+            self.__work()
+        except Exception:
+            logger.exception("Archiving to %s failed", self.directory)
+
+    def __work(self):
+        while True:
+            with self.__condition:
+                if not self.__pending and not self.__closed:
+                    self.__condition.wait(self.flush_interval)
+
+                entries = self.__pending
+                self.__pending = deque()
+                closed = self.__closed
+
+            now = time.monotonic()
+
+            for entry in entries:
+                if self.__block_records == 0:
+                    self.__block_started = now
+
+                self.__encode(entry)
+                self.__block_records += 1
+
+                if len(self.__block) >= self.block_size:
+                    self.__write_block(now)
+
+            if self.__block_records > 0 and (closed or now - self.__block_started >= self.flush_interval):
+                self.__write_block(now)
+
+            if closed:
+                self.__close_file(now)
+                return
+
+            if self.__file is not None and now - self.__synced_at >= self.fsync_interval:
+                self.__sync(now)
+
+    def close(self):
+        """
+        Write and sync everything queued so far and close the current file
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+            thread = self.__thread
+
+        if thread is not None:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def stats(self):
+        """
+        :return: Dictionary of archival metrics, bytes_written after compression
+        """
+        return {
+            'archived': self.archived,
+            'pending': len(self.__pending),
+            'dropped': self.dropped,
+            'blocks': self.blocks,
+            'bytes_written': self.bytes_written,
+            'fsyncs': self.fsyncs,
+            'files': len(self.files)
+        }
+
+
+class ArchiveReader:
+
+    def __init__(self, path):
+        """
+        Iterates the messages of an archive file, memory mapping it instead of reading it into memory.
+        Only one block is decompressed at a time. A truncated last block, left by a crash, ends the iteration.
+
+        :param path: Path of the archive file
+        """
+        self.path = path
+        self.codec = None
+
+        self.__file = open(path, 'rb')
+        self.__map = None
+        self.__decompressor = None
+
+        if os.fstat(self.__file.fileno()).st_size > 0:
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __decompress(self, payload):
+        if self.codec == CODEC_GZIP:
+            return gzip.decompress(payload)
+
+        if self.codec == CODEC_ZSTD:
+            if self.__decompressor is None:
+                self.__decompressor = _zstandard().ZstdDecompressor()
+
+            return self.__decompressor.decompress(payload)
+
+        return payload
+
+    def blocks(self):
+        """
+        :return: Generator of (record count, uncompressed block) tuples
+        """
+        if self.__map is None or len(self.__map) < FILE_HEADER.size:
+            return
+
+        magic, version, self.codec = FILE_HEADER.unpack_from(self.__map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a chat archive of version {}".format(self.path, VERSION))
+
+        offset = FILE_HEADER.size
+        size = len(self.__map)
+
+        while offset + BLOCK_HEADER.size <= size:
+            length, count = BLOCK_HEADER.unpack_from(self.__map, offset)
+            start = offset + BLOCK_HEADER.size
+
+            if start + length > size:
+                return
+
+            yield count, self.__decompress(self.__map[start:start + length])
+            offset = start + length
+
+    def __iter__(self):
+        for count, block in self.blocks():
+            offset = 0
+
+            for _ in range(count):
+                received_at, *lengths = RECORD_HEADER.unpack_from(block, offset)
+                offset += RECORD_HEADER.size
+                fields = []
+
+                for length in lengths:
+                    fields.append(block[offset:offset + length].decode('UTF-8', 'replace'))
+                    offset += length
+
+                type, sender, target, content, raw = fields
+                yield ArchivedMessage(received_at, type, sender or None, target or None, content, raw or None)
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_archive(directory, prefix='chat'):
+    """
+    Iterate the messages of every archive file in a directory, oldest file first
+
+    :param directory: Directory of the archive files
+    :param prefix: File name prefix given to the ChatArchiver
+    :return: Generator of ArchivedMessage
+    """
+    names = sorted(name for name in os.listdir(directory) if name.startswith(prefix + '-') and name.endswith(EXTENSION))
+
+    for name in names:
+        with ArchiveReader(os.path.join(directory, name)) as reader:
+            yield from reader
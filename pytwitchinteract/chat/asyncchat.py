@@ -0,0 +1,185 @@
+from pytwitchinteract.chat.connection import CAPABILITIES, authenticated
+from pytwitchinteract.chat.dispatch import CommandIndex
+from pytwitchinteract.chat.message import Message, Command
+from pytwitchinteract.chat.processing import LineProcessor, PONG
+from pytwitchinteract.chat.workers import run_command
+from pytwitchinteract.utils.log import configure_logging
+
+import asyncio
+import inspect
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class SlowMode:
+
+    def __init__(self):
+        """
+        Per-channel slow mode of AsyncTwitchChat, which writes chat messages without a send queue
+        """
+        self.__slow_mode = {}
+        self.__next_send = {}
+
+    def set_slow_mode(self, channel, seconds):
+        """
+        :param channel: Channel name including "#"
+        :param seconds: Minimum seconds between messages to the channel, 0 disables slow mode
+        """
+        if seconds:
+            self.__slow_mode[channel] = seconds
+        else:
+            self.__slow_mode.pop(channel, None)
+            self.__next_send.pop(channel, None)
+
+    async def wait(self, channel):
+        """
+        Wait until a message may be sent to the channel
+        """
+        seconds = self.__slow_mode.get(channel)
+
+        if seconds is None:
+            return
+
+        now = time.monotonic()
+        # The slot is reserved before sleeping, so concurrent senders queue up behind each other
+        send_at = max(now, self.__next_send.get(channel, now))
+        self.__next_send[channel] = send_at + seconds
+
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+
+class AsyncTwitchChat(LineProcessor):
+
+    def __init__(self, token, channel, host='irc.twitch.tv', port=6667, verbose=False, debug=False, moderator=False, metrics=None):
+        """
+        asyncio counterpart of TwitchChat.
+        Callbacks may be plain functions or coroutine functions, Message.reply() returns a coroutine.
+
+        :param verbose: Log connection events to stderr, unless logging is configured already
+        :param debug: Also log every received line and unprocessable messages
+        :param moderator: Whether the account is moderator, which is exempt from slow mode
+        :param metrics: Metrics recording line counts, parse time, dispatch latency and callback durations.
+            The duration of a coroutine callback only covers creating it, not the task running it.
+        """
+        self.token = token
+        self.channel = channel
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        self.debug = debug
+        self.running = False
+        self.index = CommandIndex()
+        self.commands = self.index.commands
+        self.reader = None
+        self.writer = None
+        self.tasks = set()
+        self.sinks = []
+        self.moderator = moderator
+        self.metrics = metrics
+        self.sender = SlowMode()
+
+        if not token.startswith("oauth:"):
+            self.token = "oauth:" + self.token
+
+        if not channel.startswith("#"):
+            self.channel = "#" + self.channel
+
+        configure_logging(verbose, debug)
+
+    async def connect(self):
+        if self.writer is not None:
+            self.writer.close()
+
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        logger.info("Connection established with %s:%s", self.host, self.port)
+
+        await self.__send_message("CAP REQ :{}".format(" ".join(CAPABILITIES)))
+        await self.__send_message("PASS {}".format(self.token))
+
+        # Nickname doesn't actually matter, only requires to be sent
+        await self.__send_message("NICK PyTwitch")
+
+        while True:
+            authentication = Message(self, (await self.reader.readuntil(b'\r\n')).decode('UTF-8', 'replace')[:-2])
+
+            if authenticated(authentication):
+                break
+
+        logger.info("Authenticated successfully: %s", authentication.content)
+
+        await self.__send_message("JOIN {}".format(self.channel))
+
+        logger.info("Joined channel %s", self.channel)
+
+    async def __send_message(self, message):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending: %s", message.replace(self.token, '***'))
+
+        self.writer.write(bytes('{}\r\n'.format(message), 'UTF-8'))
+        await self.writer.drain()
+
+    async def send_chat_message(self, message, channel=None):
+        """
+        Send a chat message, waiting for the slow mode of the channel
+        """
+        channel = channel or self.channel
+
+        if not self.moderator:
+            await self.sender.wait(channel)
+
+        await self.__send_message("PRIVMSG {} :{}".format(channel, message))
+
+    def set_slow_mode(self, seconds, channel=None):
+        """
+        :param seconds: Minimum seconds between messages to the channel, 0 disables slow mode
+        :param channel: Channel, defaults to the joined channel
+        """
+        self.sender.set_slow_mode(channel or self.channel, seconds)
+
+    def register_command(self, command, callback, prefix='!', beginning=True):
+        self.index.add(Command(prefix, command, beginning, callback))
+
+    def add_sink(self, sink):
+        """
+        :param sink: Function called with every parsed Message on the reading loop, for example a ChatArchiver.
+            It should only hand the message off, as a slow sink delays reading.
+        """
+        self.sinks.append(sink)
+
+    async def listen(self):
+        self.running = True
+
+        await self.connect()
+
+        logger.info("Listening to chat")
+
+        while self.running:
+            try:
+                line = await asyncio.wait_for(self.reader.readuntil(b'\r\n'), 1)
+            except asyncio.TimeoutError:
+                continue
+            except asyncio.IncompleteReadError:
+                raise ConnectionError("Connection closed by remote host")
+
+            await self._process_line(line.decode('UTF-8', 'replace')[:-2])
+
+    async def _process_line(self, line):
+        if self._handle_line(line, time.time()):
+            await self.__send_message(PONG)
+
+    def _dispatch(self, command, msg, matches):
+        result = run_command(command, msg, matches, self.metrics)
+
+        # Coroutine callbacks run as tasks so a slow callback does not stall reading
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def stop_listening(self):
+        self.running = False
@@ -1,15 +1,44 @@
+from pytwitchinteract.chat.connection import Backoff, ChatConnection, AuthenticationException
+from pytwitchinteract.chat.dispatch import CommandIndex
+from pytwitchinteract.chat.message import Command
+from pytwitchinteract.chat.processing import LineProcessor, PONG
+from pytwitchinteract.chat.sendqueue import SendQueue, PRIORITY_CONTROL, PRIORITY_MESSAGE
+from pytwitchinteract.chat.workers import CallbackPool
+from pytwitchinteract.utils.log import configure_logging
+
 from multiprocessing import Process, Value
+import logging
 import socket
-import re
-
-
-MESSAGE_PATTERN = re.compile("^:([^\n\s]+?)\s([^\n\s]+?)\s([^\n\s]+?)\s:([^\n]+?)$")
-SENDER_PATTERN = re.compile("^(.+?)!")
-
-
-class TwitchChat:
-
-    def __init__(self, token, channel, host='irc.twitch.tv', port=6667, verbose=False, debug=False):
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class TwitchChat(LineProcessor):
+
+    def __init__(self, token, channel, host='irc.twitch.tv', port=6667, verbose=False, debug=False,
+                 callback_workers=0, callback_queue_size=1000, callback_overflow='block', moderator=False, dedup_window=0,
+                 keepalive=360, reconnect_delay=1, max_reconnect_delay=120, metrics=None):
+        """
+        :param token: OAuth token
+        :param channel: Channel to join
+        :param host: IRC host
+        :param port: IRC port
+        :param verbose: Log connection events to stderr, unless logging is configured already
+        :param debug: Also log every received line and unprocessable messages
+        :param callback_workers: Amount of threads running command callbacks, 0 runs them on the reading loop
+        :param callback_queue_size: Maximum amount of callbacks waiting to run
+        :param callback_overflow: "block", "drop_oldest" or "drop_newest", see CallbackPool.
+            Only the drop policies lose callbacks, "block" stalls reading until a worker is free
+        :param moderator: Whether the account is moderator, raising the message limit from 20 to 100 per 30 seconds
+        :param dedup_window: Seconds in which identical messages to a channel are only sent once, 0 disables
+        :param keepalive: Seconds without receiving anything (Twitch sends a PING every ~5 minutes) after which
+            the connection is considered dead
+        :param reconnect_delay: Seconds to wait before the first reconnect attempt, doubled after every failed attempt
+        :param max_reconnect_delay: Maximum seconds between reconnect attempts
+        :param metrics: Metrics recording line counts, parse time, dispatch latency and callback durations
+        """
         self.token = token
         self.channel = channel
         self.host = host
@@ -17,57 +46,172 @@ class TwitchChat:
         self.verbose = verbose
         self.debug = debug
         self.running = Value('i', 0)
-        self.commands = []
+        self.index = CommandIndex()
+        self.commands = self.index.commands
+        self.connection = None
+        self.callbacks = None
+        self.moderator = moderator
+        self.sender = SendQueue(100 if moderator else 20, 30, dedup_window)
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.metrics = metrics
+        self.sinks = []
 
-        if not token.startswith("oauth:"):
-            self.token = "oauth:" + self.token
+        self.reconnects = 0
+        self.downtime = 0.0
+        self.disconnected_at = None
 
-        if not channel.startswith("#"):
-            self.channel = "#" + self.channel
+        self.__listeners = {}
 
-    def __reconnect(self):
-        if hasattr(self, 'connection') and self.connection is not None:
-            self.connection.close()
+        configure_logging(verbose, debug)
 
-        self.connection = socket.socket()
-        self.connection.settimeout(1)
-        self.connection.connect((self.host, self.port))
+        if callback_workers > 0:
+            self.callbacks = CallbackPool(callback_workers, callback_queue_size, callback_overflow, metrics)
 
-        if self.verbose:
-            print("Connection established with:", (self.host, self.port))
-
-        self.__send_message("PASS {}".format(self.token))
-
-        # Nickname doesn't actually matter, only requires to be sent
-        self.__send_message("NICK PyTwitch")
-
-        authentication = Message(self, self.connection.recv(1024).decode('UTF-8').split('\n')[0])
-
-        if 'failed' in authentication.content:
-            raise Exception(authentication.content)
-
-        if self.verbose:
-            print("Authenticated successfully:", authentication.content)
-
-        self.__send_message("JOIN {}".format(self.channel))
+        if not token.startswith("oauth:"):
+            self.token = "oauth:" + self.token
 
-        if self.verbose:
-            print("Joined channel:", self.channel)
+        if not channel.startswith("#"):
+            self.channel = "#" + self.channel
 
-    def __send_message(self, message):
-        if self.verbose:
-            print("Sending:", message.replace(self.token, '***'))
+    def on(self, event, callback):
+        """
+        :param event: "connect" after the first connection, "disconnect" with the reason when the connection is lost,
+            "reconnect" with the seconds of downtime once connected again
+        :param callback: Function called with the event arguments
+        """
+        self.__listeners.setdefault(event, []).append(callback)
+
+    def __emit(self, event, *args):
+        for callback in self.__listeners.get(event, []):
+            # A failing listener must not end the listening loop it is called from
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("%s listener failed", event)
 
-        self.connection.send(bytes('{}\r\n'.format(message), 'UTF-8'))
+    def __reconnect(self):
+        """
+        Connect, retrying with exponential backoff and jitter until connected or stopped.
+        The connection re-authenticates and re-joins its channels on every attempt.
 
-    def send_chat_message(self, message):
-        self.__send_message("PRIVMSG {} :{}".format(self.channel, message))
+        :return: True once connected, False if listening was stopped first
+        """
+        if self.connection is None:
+            self.connection = ChatConnection(self.token, self.host, self.port, self.verbose)
+            self.connection.join(self.channel)
 
-    def register_command(self, command, callback, prefix='!', beginning=True):
-        self.commands.append(Command(prefix, command, beginning, callback))
+        backoff = Backoff(self.reconnect_delay, self.max_reconnect_delay)
 
-    def listen(self, async=False):
-        if async:
+        while self.running.value == 1:
+            try:
+                self.connection.connect()
+                return True
+            except AuthenticationException:
+                raise
+            except OSError as e:
+                logger.warning("Connecting failed: %s", e)
+
+            deadline = time.monotonic() + backoff.next()
+
+            while self.running.value == 1 and time.monotonic() < deadline:
+                time.sleep(min(0.5, max(deadline - time.monotonic(), 0)))
+
+        return False
+
+    def __disconnected(self, reason):
+        self.disconnected_at = time.monotonic()
+        self.connection.close()
+
+        logger.warning("Disconnected: %s", reason)
+
+        self.__emit('disconnect', reason)
+
+        if not self.__reconnect():
+            return
+
+        downtime = time.monotonic() - self.disconnected_at
+        self.reconnects += 1
+        self.downtime += downtime
+        self.disconnected_at = None
+
+        logger.info("Reconnected after %.1f seconds", downtime)
+
+        self.__emit('reconnect', downtime)
+
+    def connection_stats(self):
+        """
+        :return: Dictionary of connection metrics, downtime in seconds
+        """
+        downtime = self.downtime
+
+        if self.disconnected_at is not None:
+            downtime += time.monotonic() - self.disconnected_at
+
+        return {
+            'connected': self.connection is not None and self.connection.socket is not None,
+            'reconnects': self.reconnects,
+            'downtime': downtime,
+            'idle': self.connection.idle_time() if self.connection is not None else None
+        }
+
+    def __send_message(self, message, channel=None, priority=PRIORITY_CONTROL):
+        if self.connection is None:
+            raise Exception("Not connected")
+
+        return self.sender.enqueue(self.connection, message, channel, priority)
+
+    def send_chat_message(self, message, channel=None):
+        """
+        Queue a chat message, sent as the rate limit and slow mode allow
+
+        :return: Future resolved once the message was sent
+        """
+        channel = channel or self.channel
+        return self.__send_message("PRIVMSG {} :{}".format(channel, message), channel, PRIORITY_MESSAGE)
+
+    def set_slow_mode(self, seconds, channel=None):
+        """
+        :param seconds: Minimum seconds between messages to the channel, 0 disables slow mode
+        :param channel: Channel, defaults to the joined channel
+        """
+        self.sender.set_slow_mode(channel or self.channel, seconds)
+
+    def send_stats(self):
+        """
+        :return: Dictionary of send queue metrics
+        """
+        return self.sender.stats()
+
+    def register_command(self, command, callback, prefix='!', beginning=True, max_concurrency=None):
+        """
+        :param command: Command name or list of aliases
+        :param callback: Function called with the message and matches
+        :param prefix: Command prefix
+        :param beginning: Whether the command has to be at the beginning of the message
+        :param max_concurrency: Maximum amount of callbacks of this command running at the same time
+        """
+        self.index.add(Command(prefix, command, beginning, callback, max_concurrency))
+
+    def add_sink(self, sink):
+        """
+        :param sink: Function called with every parsed Message on the reading loop, for example a ChatArchiver.
+            It should only hand the message off, as a slow sink delays reading.
+        """
+        self.sinks.append(sink)
+
+    def callback_stats(self):
+        """
+        :return: Dictionary of callback queue metrics, or None when callbacks run on the reading loop
+        """
+        if self.callbacks is None:
+            return None
+
+        return self.callbacks.stats()
+
+    def listen(self, async_=False):
+        if async_:
             p = Process(target=self._listen_internal, args=(self.running,))
             p.start()
         else:
@@ -76,92 +220,52 @@ class TwitchChat:
     def _listen_internal(self, running):
         running.value = 1
 
-        self.__reconnect()
-
-        if self.verbose:
-            print("Listening to chat")
-
-        line = ""
-        while running.value == 1:
-            try:
-                line += self.connection.recv(1).decode('UTF-8', 'replace')
-                if line[-2:] == '\r\n':
-                    print("Received:", line.encode('ascii', 'ignore').decode('ascii').rstrip())
-                    try:
-                        if line.startswith("PING :tmi.twitch.tv"):
-                            self.__send_message("PONG tmi.twitch.tv")
-
-                        else:
-                            msg = Message(self, line[:-2])
-                            for command in self.commands:
-                                matches = command.matches(msg)
-                                if len(matches) > 0:
-                                    command.callback(msg, matches)
-                    except MessageProcessException as e:
-                        if self.debug:
-                            print(e)
-
-                    line = ""
-            except socket.timeout:
-                pass
-
-    def stop_listening(self):
-        self.running.value = 0
-
-
-class Message:
-
-    def __init__(self, chat, message):
-        self.chat = chat
+        if not self.__reconnect():
+            return
 
-        if not isinstance(message, str):
-            raise Exception("Message not a string")
+        self.__emit('connect')
+        self.sender.start()
 
-        data = MESSAGE_PATTERN.search(message)
+        if self.callbacks is not None:
+            self.callbacks.start()
 
-        if data is None:
-            raise MessageProcessException(message)
+        logger.info("Listening to chat")
 
-        self.sender = data.group(1)
-        self.type = data.group(2)
-        self.target = data.group(3)
-        self.content = data.group(4)
+        try:
+            while running.value == 1:
+                try:
+                    lines = self.connection.read_lines()
+                except socket.timeout:
+                    if self.connection.idle_time() > self.keepalive:
+                        self.__disconnected("No data received for {} seconds".format(self.keepalive))
+                    continue
+                except OSError as e:
+                    self.__disconnected(e)
+                    continue
 
-        if self.content[-1] == '\r':
-            self.content = self.content[:-1]
+                received_at = time.time()
 
-        user = SENDER_PATTERN.search(self.sender)
+                for line in lines:
+                    if line.startswith(":tmi.twitch.tv RECONNECT"):
+                        # Twitch is about to restart the server, the remaining lines are dropped with the connection
+                        self.__disconnected("Server requested reconnect")
+                        break
 
-        if user is not None:
-            self.sender = user.group(1)
+                    self._process_line(line, received_at)
+        finally:
+            if self.callbacks is not None:
+                self.callbacks.stop()
 
-    def reply(self, message):
-        self.chat.send_chat_message(message)
-
-
-class MessageProcessException(Exception):
-
-    def __init__(self, message):
-        Exception.__init__(self, "Failed to process message: '{}'".format(message))
-
-
-class Command:
-
-    def __init__(self, prefix, command, beginning, callback):
-        if not isinstance(command, list):
-            command = [command]
-
-        self.prefix = prefix
-        self.command = command
-        self.beginning = beginning
-        self.callback = callback
+            self.sender.stop()
+            self.connection.close()
 
-        regex = "(?:(?:(?<=\s)|(?<=^))({})(?:(?=\s)|(?=$)))+".format("|".join(list(map(lambda z: re.escape(prefix) + re.escape(z), command))))
+            if self.disconnected_at is not None:
+                self.downtime += time.monotonic() - self.disconnected_at
+                self.disconnected_at = None
 
-        if beginning:
-            self.matcher = re.compile("^" + regex)
-        else:
-            self.matcher = re.compile(regex)
+    def _process_line(self, line, received_at=None):
+        if self._handle_line(line, received_at):
+            self.__send_message(PONG)
 
-    def matches(self, message):
-        return self.matcher.findall(message.content)
+    def stop_listening(self):
+        self.running.value = 0
@@ -0,0 +1,212 @@
+from pytwitchinteract.chat.linereader import LineReader
+from pytwitchinteract.chat.message import Message
+from pytwitchinteract.utils.log import configure_logging
+
+import logging
+import random
+import socket
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+# Adds IRCv3 tags to messages, Twitch specific commands (ROOMSTATE, USERNOTICE, ...) and JOIN/PART of other users
+CAPABILITIES = ('twitch.tv/tags', 'twitch.tv/commands', 'twitch.tv/membership')
+
+
+class AuthenticationException(Exception):
+    pass
+
+
+def authenticated(message):
+    """
+    Check a line received while logging in
+
+    :param message: Message received before the welcome
+    :return: True once the welcome (001) was received, False for other lines (CAP ACK, ...)
+    """
+    if message.type == '001':
+        return True
+
+    # Twitch answers a rejected token with a NOTICE, e.g. "Login authentication failed"
+    if message.type == 'NOTICE' or 'failed' in message.content:
+        raise AuthenticationException(message.content)
+
+    return False
+
+
+class Backoff:
+
+    def __init__(self, delay=1, max_delay=120):
+        """
+        Exponential backoff with full jitter between reconnect attempts,
+        so many clients disconnected at once don't reconnect in lockstep
+
+        :param delay: Seconds to wait after the first failed attempt, doubled after every further one
+        :param max_delay: Maximum seconds between attempts
+        """
+        self.delay = delay
+        self.max_delay = max_delay
+
+    def next(self):
+        """
+        :return: Seconds to wait before the next attempt
+        """
+        delay = random.uniform(self.delay / 2, self.delay)
+        self.delay = min(self.delay * 2, self.max_delay)
+
+        return delay
+
+
+class ChatConnection:
+
+    def __init__(self, token, host='irc.twitch.tv', port=6667, verbose=False, capabilities=CAPABILITIES):
+        """
+        Single authenticated IRC connection, which may be joined to any number of channels
+
+        :param token: OAuth token, prefixed with "oauth:"
+        :param host: IRC host
+        :param port: IRC port
+        :param verbose: Log connection events to stderr, unless logging is configured already
+        :param capabilities: IRCv3 capabilities to request
+        """
+        self.token = token
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        self.capabilities = capabilities
+        self.channels = set()
+        self.socket = None
+        self.reader = None
+
+        # True once authenticated and joined, until closed. SendQueue only sends over ready connections.
+        self.ready = False
+        # Held while connecting, so lines sent from other threads never interleave with the login
+        self.__write_lock = threading.RLock()
+
+        # Monotonic time anything was last received, used to detect dead connections
+        self.last_received = None
+
+        configure_logging(verbose, False)
+
+    def connect(self):
+        """
+        (Re)connect, authenticate and join all channels of this connection
+        """
+        with self.__write_lock:
+            self.close()
+
+            self.socket = socket.socket()
+            self.socket.settimeout(1)
+            self.socket.connect((self.host, self.port))
+            self.reader = LineReader(self.socket)
+
+            logger.info("Connection established with %s:%s", self.host, self.port)
+
+            if self.capabilities:
+                self.send("CAP REQ :{}".format(" ".join(self.capabilities)))
+
+            self.send("PASS {}".format(self.token))
+
+            # Nickname doesn't actually matter, only requires to be sent
+            self.send("NICK PyTwitch")
+
+            try:
+                while True:
+                    authentication = Message(self, self.reader.read_line())
+
+                    if authenticated(authentication):
+                        break
+            except BaseException:
+                self.close()
+                raise
+
+            self.last_received = time.monotonic()
+
+            logger.info("Authenticated successfully: %s", authentication.content)
+
+            for channel in self.channels:
+                self.__send_join(channel)
+
+            self.ready = True
+
+    def close(self):
+        # Waits for a send in progress, which would otherwise find the socket gone
+        with self.__write_lock:
+            self.ready = False
+
+            if self.socket is not None:
+                self.socket.close()
+                self.socket = None
+                self.reader = None
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def idle_time(self):
+        """
+        :return: Seconds since anything was received, or None if not connected
+        """
+        if self.socket is None or self.last_received is None:
+            return None
+
+        return time.monotonic() - self.last_received
+
+    def send(self, message):
+        with self.__write_lock:
+            if self.socket is None:
+                raise ConnectionError("Not connected")
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sending: %s", message.replace(self.token, '***'))
+
+            self.socket.sendall(bytes('{}\r\n'.format(message), 'UTF-8'))
+
+    def __send_join(self, channel):
+        self.send("JOIN {}".format(channel))
+
+        logger.info("Joined channel %s", channel)
+
+    def join(self, channel):
+        self.channels.add(channel)
+
+        if self.socket is not None:
+            self.__send_join(channel)
+
+    def part(self, channel):
+        self.channels.discard(channel)
+
+        if self.socket is not None:
+            self.send("PART {}".format(channel))
+
+            logger.info("Left channel %s", channel)
+
+    def read_lines(self):
+        """
+        :return: List of received lines, blocking until at least one is available
+        """
+        lines = self.reader.read_lines()
+
+        if lines:
+            self.last_received = time.monotonic()
+
+        return lines
+
+    def read_available(self):
+        """
+        :return: List of received lines, reading the socket at most once
+        """
+        lines = self.reader.read_available()
+
+        if lines:
+            self.last_received = time.monotonic()
+
+        return lines
+
+    def read_pending(self):
+        """
+        :return: List of lines already received, without reading the socket
+        """
+        return self.reader.read_pending()
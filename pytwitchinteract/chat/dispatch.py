@@ -0,0 +1,71 @@
+class CommandIndex:
+
+    def __init__(self):
+        """
+        Token lookup table finding all matching commands of a message in a single pass.
+        Results are identical to calling Command.matches on every registered command.
+        """
+        self.commands = []
+
+        self.__tokens = {}
+        self.__fallback = []
+
+    def add(self, command):
+        """
+        :param command: Command to register
+        """
+        order = len(self.commands)
+        self.commands.append(command)
+
+        # The regex matches an alias listed twice only once
+        names = list(dict.fromkeys(command.command))
+
+        for name in names:
+            token = command.prefix + name
+
+            if token == '' or token.split() != [token]:
+                # Tokens containing whitespace can't be looked up, keep using the regex for those
+                self.__fallback.append((order, command))
+                break
+
+        else:
+            for name in names:
+                self.__tokens.setdefault(command.prefix + name, []).append((order, command))
+
+    def match(self, content):
+        """
+        :param content: Message content
+
+        :return: List of (command, matches) tuples in registration order
+        """
+        found = {}
+        tokens = content.split()
+
+        # Commands matching only at the beginning require the content to start with the token
+        at_beginning = len(content) > 0 and not content[0].isspace()
+
+        for position, token in enumerate(tokens):
+            entries = self.__tokens.get(token)
+
+            if entries is None:
+                continue
+
+            for order, command in entries:
+                if command.beginning and (position != 0 or not at_beginning):
+                    continue
+
+                if order in found:
+                    found[order][1].append(token)
+                else:
+                    found[order] = (command, [token])
+
+        for order, command in self.__fallback:
+            matches = command.matcher.findall(content)
+
+            if len(matches) > 0:
+                found[order] = (command, matches)
+
+        if len(found) < 2:
+            return list(found.values())
+
+        return [found[order] for order in sorted(found)]
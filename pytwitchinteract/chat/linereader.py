@@ -0,0 +1,106 @@
+from collections import deque
+
+
+LINE_SEPARATOR = b'\r\n'
+
+
+class LineReader:
+
+    def __init__(self, connection, chunk_size=16384, encoding='UTF-8'):
+        """
+        Buffered reader splitting a socket stream into \\r\\n terminated lines
+
+        :param connection: Connected socket
+        :param chunk_size: Amount of bytes to read per recv call
+        :param encoding: Encoding of the stream
+        """
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+
+        self.__buffer = bytearray()
+        self.__chunk = bytearray(chunk_size)
+        self.__pending = deque()
+
+    def __fill(self):
+        received = self.connection.recv_into(self.__chunk)
+
+        if received == 0:
+            raise ConnectionError("Connection closed by remote host")
+
+        self.__buffer += memoryview(self.__chunk)[:received]
+
+    def __split(self):
+        buffer = self.__buffer
+        view = memoryview(buffer)
+        lines = []
+        start = 0
+
+        try:
+            while True:
+                end = buffer.find(LINE_SEPARATOR, start)
+
+                if end == -1:
+                    break
+
+                lines.append(str(view[start:end], self.encoding, 'replace'))
+                start = end + 2
+        finally:
+            view.release()
+
+        if start > 0:
+            del buffer[:start]
+
+        return lines
+
+    def read_lines(self):
+        """
+        Read all complete lines, blocking until at least one is available.
+        Raises socket.timeout if the socket times out before a full line arrived.
+
+        :return: List of lines without the line separator
+        """
+        if self.__pending:
+            lines = list(self.__pending)
+            self.__pending.clear()
+            return lines
+
+        while True:
+            self.__fill()
+            lines = self.__split()
+
+            if lines:
+                return lines
+
+    def read_available(self):
+        """
+        Read the socket once and return whatever complete lines are available
+
+        :return: Possibly empty list of lines without the line separator
+        """
+        lines = self.read_pending()
+
+        self.__fill()
+        lines.extend(self.__split())
+
+        return lines
+
+    def read_pending(self):
+        """
+        :return: List of lines which were already read from the socket, without reading it
+        """
+        lines = list(self.__pending)
+        self.__pending.clear()
+
+        return lines
+
+    def read_line(self):
+        """
+        Read a single line, blocking until it is available
+
+        :return: Line without the line separator
+        """
+        if not self.__pending:
+            self.__pending.extend(self.read_lines())
+
+        return self.__pending.popleft()
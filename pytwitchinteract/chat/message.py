@@ -0,0 +1,212 @@
+import re
+
+
+# Escaped characters of IRCv3 tag values
+TAG_ESCAPES = {':': ';', 's': ' ', '\\': '\\', 'r': '\r', 'n': '\n'}
+
+
+def unescape_tag(value):
+    if '\\' not in value:
+        return value
+
+    result = []
+    i = 0
+
+    while i < len(value):
+        char = value[i]
+
+        if char == '\\':
+            i += 1
+
+            if i < len(value):
+                result.append(TAG_ESCAPES.get(value[i], value[i]))
+        else:
+            result.append(char)
+
+        i += 1
+
+    return ''.join(result)
+
+
+def normalize_channel(channel):
+    """
+    :return: Lower case channel name prefixed with "#"
+    """
+    if not channel.startswith("#"):
+        return "#" + channel.lower()
+
+    return channel.lower()
+
+
+class Message:
+
+    __slots__ = ('chat', 'raw', 'received_at', 'prefix', 'type', 'params', 'content', 'sender', 'target', '_raw_tags', '_tags')
+
+    def __init__(self, chat, message, received_at=None):
+        """
+        Parses an IRC line: [@tags] [:prefix] command [params...] [:trailing]
+
+        Only the positions of the tags are stored, they are parsed on first access of Message.tags.
+
+        :param chat: Chat the message was received by, used to reply
+        :param message: Line without the line separator
+        :param received_at: time.time() the line was read from the socket
+        """
+        self.chat = chat
+        self.received_at = received_at
+
+        if not isinstance(message, str):
+            raise Exception("Message not a string")
+
+        if message.endswith('\r'):
+            message = message[:-1]
+
+        self.raw = message
+        position = 0
+        self._raw_tags = None
+        self._tags = None
+        self.prefix = None
+
+        if message.startswith('@'):
+            position = message.find(' ')
+
+            if position == -1:
+                raise MessageProcessException(message)
+
+            self._raw_tags = message[1:position]
+            position += 1
+
+        if message.startswith(':', position):
+            end = message.find(' ', position)
+
+            if end == -1:
+                raise MessageProcessException(message)
+
+            self.prefix = message[position + 1:end]
+            position = end + 1
+
+        trailing_start = message.find(' :', position)
+
+        if trailing_start == -1:
+            params = message[position:].split()
+            self.content = ''
+        else:
+            params = message[position:trailing_start].split()
+            self.content = message[trailing_start + 2:]
+
+        if len(params) == 0:
+            raise MessageProcessException(message)
+
+        self.type = params[0]
+        self.params = params[1:]
+
+        if trailing_start != -1:
+            self.params.append(self.content)
+
+        self.target = self.params[0] if self.params else None
+
+        if self.prefix is not None:
+            end = self.prefix.find('!')
+            self.sender = self.prefix[:end] if end != -1 else self.prefix
+        else:
+            self.sender = None
+
+    @property
+    def tags(self):
+        """
+        :return: Dictionary of IRCv3 tags, empty if the twitch.tv/tags capability wasn't requested
+        """
+        if self._tags is None:
+            if not self._raw_tags:
+                self._tags = {}
+            elif '\\' not in self._raw_tags and '=' in self._raw_tags:
+                # Fast path, nothing to unescape
+                self._tags = dict(tag.split('=', 1) if '=' in tag else (tag, '') for tag in self._raw_tags.split(';'))
+            else:
+                self._tags = {}
+
+                for tag in self._raw_tags.split(';'):
+                    key, _, value = tag.partition('=')
+                    self._tags[key] = unescape_tag(value)
+
+        return self._tags
+
+    def tag(self, name, default=None):
+        """
+        Look up a single tag, without parsing all tags if they weren't parsed yet.
+        Tags without a value (no "=") are only found through Message.tags.
+
+        :param name: Tag name, for example "user-id"
+        :param default: Value if the tag is missing
+        """
+        if self._tags is not None:
+            return self._tags.get(name, default)
+
+        raw = self._raw_tags
+
+        if not raw:
+            return default
+
+        key = name + '='
+
+        if raw.startswith(key):
+            start = len(key)
+        else:
+            start = raw.find(';' + key)
+
+            if start == -1:
+                return default
+
+            start += len(key) + 1
+
+        end = raw.find(';', start)
+
+        return unescape_tag(raw[start:end] if end != -1 else raw[start:])
+
+    @property
+    def user_id(self):
+        return self.tag('user-id')
+
+    @property
+    def badges(self):
+        """
+        :return: Dictionary of badge name to version, for example {'subscriber': '12'}
+        """
+        badges = self.tag('badges')
+
+        if not badges:
+            return {}
+
+        return dict(badge.partition('/')[::2] for badge in badges.split(','))
+
+    def reply(self, message):
+        return self.chat.send_chat_message(message, self.target)
+
+
+class MessageProcessException(Exception):
+
+    def __init__(self, message):
+        Exception.__init__(self, "Failed to process message: '{}'".format(message))
+
+
+class Command:
+
+    def __init__(self, prefix, command, beginning, callback, max_concurrency=None):
+        if not isinstance(command, list):
+            command = [command]
+
+        self.prefix = prefix
+        self.command = command
+        self.beginning = beginning
+        self.callback = callback
+        self.max_concurrency = max_concurrency
+
+        regex = "(?:(?:(?<=\s)|(?<=^))({})(?:(?=\s)|(?=$)))+".format("|".join(list(map(lambda z: re.escape(prefix) + re.escape(z), command))))
+
+        if beginning:
+            self.matcher = re.compile("^" + regex)
+        else:
+            self.matcher = re.compile(regex)
+
+    def matches(self, message):
+        return self.matcher.findall(message.content)
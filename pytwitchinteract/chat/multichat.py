@@ -0,0 +1,398 @@
+from pytwitchinteract.chat.connection import AuthenticationException, Backoff, ChatConnection
+from pytwitchinteract.chat.dispatch import CommandIndex
+from pytwitchinteract.chat.message import Command, normalize_channel
+from pytwitchinteract.chat.processing import LineProcessor, PONG
+from pytwitchinteract.chat.sendqueue import SendQueue, PRIORITY_CONTROL
+from pytwitchinteract.chat.workers import CallbackPool
+from pytwitchinteract.utils.log import configure_logging
+
+from collections import deque
+import logging
+import selectors
+import socket
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class MultiTwitchChat(LineProcessor):
+
+    def __init__(self, token, channels=None, host='irc.twitch.tv', port=6667, channels_per_connection=100, joins_per_window=20, join_window=10, verbose=False, debug=False,
+                 callback_workers=0, callback_queue_size=1000, callback_overflow='block', moderator=False, dedup_window=0,
+                 keepalive=360, reconnect_delay=1, max_reconnect_delay=120, metrics=None):
+        """
+        Chat client multiplexing many channels over a few shared IRC connections
+
+        :param token: OAuth token
+        :param channels: Channels to join once listening
+        :param host: IRC host
+        :param port: IRC port
+        :param channels_per_connection: Maximum amount of channels joined on a single connection
+        :param joins_per_window: Maximum amount of JOINs sent per join window (Twitch allows 20 per 10 seconds)
+        :param join_window: Length of the join window in seconds
+        :param verbose: Log connection events to stderr, unless logging is configured already
+        :param debug: Also log every received line and unprocessable messages
+        :param callback_workers: Amount of threads running command callbacks, 0 runs them on the reading loop
+        :param callback_queue_size: Maximum amount of callbacks waiting to run
+        :param callback_overflow: "block", "drop_oldest" or "drop_newest", see CallbackPool.
+            Only the drop policies lose callbacks, "block" stalls reading until a worker is free
+        :param moderator: Whether the account is moderator, raising the message limit from 20 to 100 per 30 seconds
+        :param dedup_window: Seconds in which identical messages to a channel are only sent once, 0 disables
+        :param keepalive: Seconds without receiving anything (Twitch sends a PING every ~5 minutes) after which
+            a connection is considered dead
+        :param reconnect_delay: Seconds to wait before the second reconnect attempt, doubled after every failed attempt
+        :param max_reconnect_delay: Maximum seconds between reconnect attempts
+        :param metrics: Metrics recording line counts, parse time, dispatch latency and callback durations
+        """
+        self.token = token
+        self.host = host
+        self.port = port
+        self.channels_per_connection = channels_per_connection
+        self.joins_per_window = joins_per_window
+        self.join_window = join_window
+        self.verbose = verbose
+        self.debug = debug
+        self.running = False
+
+        # Commands registered for every channel are stored under None
+        self.commands = {None: CommandIndex()}
+        self.connections = []
+        self.channels = {}
+        self.callbacks = None
+        # Shared by all connections, as Twitch counts messages per account
+        self.moderator = moderator
+        self.sender = SendQueue(100 if moderator else 20, 30, dedup_window)
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.metrics = metrics
+        self.sinks = []
+
+        self.reconnects = 0
+
+        if callback_workers > 0:
+            self.callbacks = CallbackPool(callback_workers, callback_queue_size, callback_overflow, metrics)
+
+        self.__lock = threading.Lock()
+        self.__pending = deque()
+        self.__joins = deque()
+        self.__selector = None
+        # Closed connections waiting to reconnect, mapped to their backoff and the monotonic time of the next attempt
+        self.__retries = {}
+
+        configure_logging(verbose, debug)
+
+        if not token.startswith("oauth:"):
+            self.token = "oauth:" + self.token
+
+        for channel in channels or []:
+            self.join(channel)
+
+    def join(self, channel):
+        """
+        Join a channel. Joins are sent from the listening loop, paced to the join rate limit.
+        Joining a channel again before a part() was sent cancels the part.
+
+        :param channel: Channel name
+        """
+        channel = normalize_channel(channel)
+
+        with self.__lock:
+            if channel not in self.channels:
+                self.channels[channel] = None
+                self.__pending.append(('join', channel))
+
+    def part(self, channel):
+        """
+        Leave a channel and drop its commands
+
+        :param channel: Channel name
+        """
+        channel = normalize_channel(channel)
+
+        with self.__lock:
+            if channel in self.channels:
+                del self.channels[channel]
+                self.__pending.append(('part', channel))
+                self.commands.pop(channel, None)
+
+    def register_command(self, command, callback, prefix='!', beginning=True, channel=None, max_concurrency=None):
+        """
+        :param command: Command name or list of aliases
+        :param callback: Function called with the message and matches
+        :param prefix: Command prefix
+        :param beginning: Whether the command has to be at the beginning of the message
+        :param channel: Channel the command applies to, or None for every channel
+        :param max_concurrency: Maximum amount of callbacks of this command running at the same time
+        """
+        if channel is not None:
+            channel = normalize_channel(channel)
+
+        with self.__lock:
+            if channel not in self.commands:
+                self.commands[channel] = CommandIndex()
+
+            self.commands[channel].add(Command(prefix, command, beginning, callback, max_concurrency))
+
+    def add_sink(self, sink):
+        """
+        :param sink: Function called with every parsed Message on the reading loop, for example a ChatArchiver.
+            It should only hand the message off, as a slow sink delays reading.
+        """
+        self.sinks.append(sink)
+
+    def callback_stats(self):
+        """
+        :return: Dictionary of callback queue metrics, or None when callbacks run on the reading loop
+        """
+        if self.callbacks is None:
+            return None
+
+        return self.callbacks.stats()
+
+    def send_chat_message(self, message, channel):
+        """
+        Queue a chat message, sent as the rate limit and slow mode allow
+
+        :return: Future resolved once the message was sent
+        """
+        channel = normalize_channel(channel)
+        connection = self.channels.get(channel)
+
+        if connection is None:
+            raise Exception("Not joined to channel {}".format(channel))
+
+        return self.sender.enqueue(connection, "PRIVMSG {} :{}".format(channel, message), channel)
+
+    def set_slow_mode(self, channel, seconds):
+        """
+        :param channel: Channel name
+        :param seconds: Minimum seconds between messages to the channel, 0 disables slow mode
+        """
+        self.sender.set_slow_mode(normalize_channel(channel), seconds)
+
+    def send_stats(self):
+        """
+        :return: Dictionary of send queue metrics
+        """
+        return self.sender.stats()
+
+    def connection_stats(self):
+        """
+        :return: Dictionary of connection metrics
+        """
+        return {
+            'connections': len(self.connections),
+            'connected': sum(1 for connection in self.connections if connection.ready),
+            'reconnects': self.reconnects
+        }
+
+    def listen(self, async_=False):
+        """
+        :param async_: Listen on a background thread
+        """
+        if async_:
+            thread = threading.Thread(target=self._listen_internal, daemon=True)
+            thread.start()
+        else:
+            self._listen_internal()
+
+    def stop_listening(self):
+        self.running = False
+
+    def __shard(self):
+        """
+        :return: Connection with room for another channel, or None while the connections are waiting to reconnect
+        """
+        for connection in self.connections:
+            if connection.ready and len(connection.channels) < self.channels_per_connection:
+                return connection
+
+        closed = [connection for connection in self.connections if not connection.ready]
+
+        if closed:
+            connection = min(closed, key=lambda connection: self.__retries.get(connection, (None, 0))[1])
+        else:
+            connection = ChatConnection(self.token, self.host, self.port, self.verbose)
+            self.connections.append(connection)
+
+        return self.__connect(connection)
+
+    def __connect(self, connection):
+        backoff, retry_at = self.__retries.get(connection, (None, 0))
+
+        if time.monotonic() < retry_at:
+            return None
+
+        try:
+            connection.connect()
+        except AuthenticationException:
+            raise
+        except OSError as e:
+            logger.warning("Connecting failed: %s", e)
+
+            backoff = backoff or Backoff(self.reconnect_delay, self.max_reconnect_delay)
+            self.__retries[connection] = (backoff, time.monotonic() + backoff.next())
+            return None
+
+        if self.__retries.pop(connection, None) is not None:
+            self.reconnects += 1
+            logger.info("Reconnected to %s:%s", self.host, self.port)
+
+        self.__selector.register(connection, selectors.EVENT_READ)
+
+        for line in connection.read_pending():
+            self._process_line(line, connection)
+
+        return connection
+
+    def __disconnected(self, connection, reason):
+        """
+        Close a lost connection and queue its channels to be joined again, the other connections keep reading
+        """
+        logger.warning("Disconnected from %s:%s: %s", self.host, self.port, reason)
+
+        self.__selector.unregister(connection)
+        connection.close()
+
+        with self.__lock:
+            for channel in connection.channels:
+                if channel in self.channels:
+                    self.channels[channel] = None
+                    self.__pending.append(('join', channel))
+
+        connection.channels.clear()
+
+        # The first attempt is made right away, only failed attempts back off
+        self.__retries[connection] = (None, 0)
+
+    def __joined(self, channel):
+        for connection in self.connections:
+            if channel in connection.channels:
+                return connection
+
+        return None
+
+    def __apply_pending(self):
+        now = time.monotonic()
+
+        while self.__joins and self.__joins[0] <= now - self.join_window:
+            self.__joins.popleft()
+
+        while self.__pending:
+            with self.__lock:
+                action, channel = self.__pending[0]
+
+                if action == 'join' and len(self.__joins) >= self.joins_per_window:
+                    return
+
+                self.__pending.popleft()
+                wanted = channel in self.channels
+
+            # Joins and parts are reconciled against what the connections joined,
+            # so a channel joined again before its part was sent stays joined
+            connection = self.__joined(channel)
+
+            if action == 'join':
+                if not wanted:
+                    continue
+
+                if connection is None:
+                    connection = self.__shard()
+
+                    if connection is None:
+                        with self.__lock:
+                            self.__pending.appendleft((action, channel))
+
+                        return
+
+                    connection.join(channel)
+                    self.__joins.append(now)
+
+                with self.__lock:
+                    if channel in self.channels:
+                        self.channels[channel] = connection
+            elif not wanted and connection is not None:
+                connection.part(channel)
+
+    def _listen_internal(self):
+        self.running = True
+        self.__selector = selectors.DefaultSelector()
+        self.sender.start()
+
+        if self.callbacks is not None:
+            self.callbacks.start()
+
+        logger.info("Listening to chat")
+
+        try:
+            while self.running:
+                self._heartbeat()
+                self.__apply_pending()
+                self.__check_idle()
+
+                for key, _ in self.__selector.select(timeout=1):
+                    connection = key.fileobj
+
+                    try:
+                        lines = connection.read_available()
+                    except socket.timeout:
+                        continue
+                    except OSError as e:
+                        self.__disconnected(connection, e)
+                        continue
+
+                    received_at = time.time()
+
+                    for line in lines:
+                        if line.startswith(":tmi.twitch.tv RECONNECT"):
+                            # Twitch is about to restart the server, the remaining lines are dropped with the connection
+                            self.__disconnected(connection, "Server requested reconnect")
+                            break
+
+                        self._process_line(line, connection, received_at)
+        finally:
+            if self.callbacks is not None:
+                self.callbacks.stop()
+
+            self.sender.stop()
+            self.__selector.close()
+
+            for connection in self.connections:
+                connection.close()
+
+            self.connections = []
+            self.__retries.clear()
+
+            with self.__lock:
+                for channel in self.channels:
+                    self.channels[channel] = None
+                    self.__pending.append(('join', channel))
+
+    def __check_idle(self):
+        for connection in self.connections:
+            idle = connection.idle_time() if connection.ready else None
+
+            if idle is not None and idle > self.keepalive:
+                self.__disconnected(connection, "No data received for {} seconds".format(self.keepalive))
+
+    def _heartbeat(self):
+        """
+        Called on every iteration of the listening loop, at least once per second
+        """
+        pass
+
+    def _match(self, msg):
+        matched = self.commands[None].match(msg.content)
+        index = self.commands.get(msg.target)
+
+        if index is not None:
+            matched += index.match(msg.content)
+
+        return matched
+
+    def _process_line(self, line, connection, received_at=None):
+        if self._handle_line(line, received_at):
+            self.sender.enqueue(connection, PONG, priority=PRIORITY_CONTROL)
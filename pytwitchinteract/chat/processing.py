@@ -0,0 +1,79 @@
+from pytwitchinteract.chat.message import Message, MessageProcessException
+from pytwitchinteract.chat.workers import run_command
+
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+PING = "PING :tmi.twitch.tv"
+PONG = "PONG tmi.twitch.tv"
+
+
+class LineProcessor:
+    """
+    Mixin handling received lines, shared by the chats: metrics, parsing, sinks, slow mode from ROOMSTATE
+    and matching and dispatching commands. Answering PINGs is left to the chat, as it depends on how it sends.
+
+    Chats set sinks, and optionally metrics, sender, moderator and callbacks.
+    """
+
+    metrics = None
+    sender = None
+    moderator = False
+    callbacks = None
+
+    def _handle_line(self, line, received_at=None):
+        """
+        :param line: Received line without the line separator
+        :param received_at: time.time() the line was read from the socket
+        :return: True if the line was a PING, which the caller has to answer with PONG
+        """
+        logger.debug("Received: %s", line)
+
+        if self.metrics is not None:
+            self.metrics.increment('chat_lines_total')
+
+        if line.startswith(PING):
+            return True
+
+        try:
+            if self.metrics is not None:
+                start = time.perf_counter()
+                msg = Message(self, line, received_at)
+                self.metrics.observe('chat_parse_seconds', time.perf_counter() - start)
+            else:
+                msg = Message(self, line, received_at)
+        except MessageProcessException as e:
+            if self.metrics is not None:
+                self.metrics.increment('chat_parse_errors_total')
+
+            logger.debug("Unprocessable line: %s", e)
+            return False
+
+        for sink in self.sinks:
+            sink(msg)
+
+        if msg.type == 'PRIVMSG':
+            if self.metrics is not None:
+                self.metrics.increment('chat_messages_total')
+
+            for command, matches in self._match(msg):
+                self._dispatch(command, msg, matches)
+        elif msg.type == 'ROOMSTATE' and self.sender is not None and not self.moderator and 'slow' in msg.tags:
+            self.sender.set_slow_mode(msg.target, int(msg.tags['slow']))
+
+        return False
+
+    def _match(self, msg):
+        """
+        :return: List of (command, matches) tuples of the commands a PRIVMSG triggers
+        """
+        return self.index.match(msg.content)
+
+    def _dispatch(self, command, msg, matches):
+        if self.callbacks is not None:
+            self.callbacks.submit(command, msg, matches)
+        else:
+            run_command(command, msg, matches, self.metrics)
@@ -0,0 +1,250 @@
+from collections import deque
+from concurrent.futures import Future
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Control lines (PONG) are sent before any queued chat message and are not paced.
+# JOIN and PART bypass the queue, ChatConnection writes them directly and MultiTwitchChat paces the JOINs
+PRIORITY_CONTROL = 0
+PRIORITY_MESSAGE = 1
+
+# Seconds between checks whether a (re)connecting connection became ready
+READY_POLL = 0.1
+
+
+class SendQueue:
+
+    def __init__(self, limit=20, window=30, dedup_window=0):
+        """
+        Outbound queue pacing chat messages to the Twitch rate limits.
+
+        Twitch allows 20 messages per 30 seconds (100 when moderator), counted over the whole account.
+        Sent messages are remembered for a sliding window, so a burst never exceeds the limit
+        in any window, and per-channel slow mode delays messages to that channel only.
+        Lines wait while their connection is not ready, e.g. reconnecting, instead of racing the login.
+
+        :param limit: Maximum amount of chat messages per window
+        :param window: Length of the window in seconds
+        :param dedup_window: Seconds in which identical messages to the same channel are coalesced, 0 disables
+        """
+        self.limit = limit
+        self.window = window
+        self.dedup_window = dedup_window
+        self.running = False
+
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+
+        self.__control = deque()
+        self.__messages = deque()
+        self.__history = deque()
+        self.__slow_mode = {}
+        self.__last_sent = {}
+        self.__recent = {}
+        self.__thread = None
+        self.__condition = threading.Condition()
+
+    def start(self):
+        with self.__condition:
+            if self.running:
+                return
+
+            self.running = True
+
+        self.__thread = threading.Thread(target=self.__work, daemon=True)
+        self.__thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stop sending, cancelling the futures of all messages still queued
+
+        :param wait: Wait for the sending thread to exit
+        """
+        with self.__condition:
+            self.running = False
+
+            for queue in (self.__control, self.__messages):
+                while queue:
+                    queue.popleft()[3].cancel()
+
+            self.__condition.notify_all()
+
+        if wait and self.__thread is not None:
+            self.__thread.join()
+
+        self.__thread = None
+
+    def set_slow_mode(self, channel, seconds):
+        """
+        :param channel: Channel name including "#"
+        :param seconds: Minimum seconds between messages to the channel, 0 disables slow mode
+        """
+        with self.__condition:
+            if seconds:
+                self.__slow_mode[channel] = seconds
+            else:
+                self.__slow_mode.pop(channel, None)
+
+            self.__condition.notify_all()
+
+    def enqueue(self, connection, line, channel=None, priority=PRIORITY_MESSAGE):
+        """
+        Queue a line without blocking
+
+        :param connection: ChatConnection to send the line over
+        :param line: Raw IRC line
+        :param channel: Channel the line is a chat message to, paced with the rate limit and slow mode
+        :param priority: PRIORITY_CONTROL or PRIORITY_MESSAGE
+
+        :return: Future resolved once the line was written to the socket
+        """
+        now = time.monotonic()
+
+        with self.__condition:
+            if priority == PRIORITY_MESSAGE and channel is not None and self.dedup_window > 0:
+                key = (channel, line)
+                recent = self.__recent.get(key)
+
+                if recent is not None and now - recent[1] < self.dedup_window and not self.__failed(recent[0]):
+                    self.coalesced += 1
+                    return recent[0]
+
+            future = Future()
+            entry = (connection, line, channel, future, now)
+
+            if priority == PRIORITY_CONTROL:
+                self.__control.append(entry)
+            else:
+                self.__messages.append(entry)
+
+                if channel is not None and self.dedup_window > 0:
+                    self.__recent[(channel, line)] = (future, now)
+                    self.__expire_recent(now)
+
+            self.__condition.notify_all()
+
+        return future
+
+    @staticmethod
+    def __failed(future):
+        return future.done() and (future.cancelled() or future.exception() is not None)
+
+    def __expire_recent(self, now):
+        for key in [key for key, (_, at) in self.__recent.items() if now - at >= self.dedup_window]:
+            del self.__recent[key]
+
+    def __channel_ready(self, channel, now):
+        slow_mode = self.__slow_mode.get(channel)
+
+        if slow_mode is None or channel not in self.__last_sent:
+            return 0
+
+        return max(self.__last_sent[channel] + slow_mode - now, 0)
+
+    def __next(self):
+        with self.__condition:
+            while True:
+                if not self.running:
+                    return None
+
+                unready = False
+
+                for entry in self.__control:
+                    if entry[0].ready:
+                        self.__control.remove(entry)
+                        return entry
+
+                    unready = True
+
+                now = time.monotonic()
+
+                while self.__history and now - self.__history[0] >= self.window:
+                    self.__history.popleft()
+
+                if len(self.__history) >= self.limit:
+                    delay = self.__history[0] + self.window - now
+                elif self.__messages:
+                    delay = None
+                    blocked = set()
+
+                    for entry in self.__messages:
+                        channel = entry[2]
+
+                        if channel in blocked:
+                            continue
+
+                        if not entry[0].ready:
+                            blocked.add(channel)
+                            unready = True
+                            continue
+
+                        wait = self.__channel_ready(channel, now)
+
+                        if wait == 0:
+                            # Messages to a channel keep their order, only other channels may overtake
+                            self.__messages.remove(entry)
+
+                            if channel is not None:
+                                self.__history.append(now)
+                                self.__last_sent[channel] = now
+
+                            return entry
+
+                        blocked.add(channel)
+                        delay = wait if delay is None else min(delay, wait)
+                else:
+                    delay = None
+
+                if unready:
+                    delay = READY_POLL if delay is None else min(delay, READY_POLL)
+
+                self.__condition.wait(delay)
+
+    def __work(self):
+        while True:
+            entry = self.__next()
+
+            if entry is None:
+                return
+
+            connection, line, channel, future, queued_at = entry
+
+            try:
+                connection.send(line)
+            except Exception as e:
+                self.failed += 1
+                future.set_exception(e)
+                logger.exception("Sending failed")
+                continue
+
+            future.set_result(None)
+
+            if channel is not None:
+                delay = time.monotonic() - queued_at
+
+                with self.__condition:
+                    self.sent += 1
+                    self.total_delay += delay
+                    self.max_delay = max(self.max_delay, delay)
+
+    def stats(self):
+        """
+        :return: Dictionary of queue metrics, delay is the time chat messages waited to be sent
+        """
+        with self.__condition:
+            return {
+                'queue_depth': len(self.__control) + len(self.__messages),
+                'window_usage': len(self.__history),
+                'sent': self.sent,
+                'failed': self.failed,
+                'coalesced': self.coalesced,
+                'average_delay': self.total_delay / self.sent if self.sent > 0 else 0.0,
+                'max_delay': self.max_delay
+            }
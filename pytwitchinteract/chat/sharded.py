@@ -0,0 +1,412 @@
+from pytwitchinteract.chat.connection import AuthenticationException, Backoff
+from pytwitchinteract.chat.message import Message, normalize_channel
+from pytwitchinteract.chat.multichat import MultiTwitchChat
+from pytwitchinteract.utils.log import configure_logging
+
+from multiprocessing import Pipe, Process, RawArray, Value
+import multiprocessing.connection
+import logging
+import sys
+import threading
+import time
+import zlib
+
+
+logger = logging.getLogger(__name__)
+
+# Per-shard counters, stored in a shared array at shard * len(COUNTERS) + offset
+COUNTERS = ('lines', 'messages', 'commands', 'results')
+
+# Exit code of a shard whose token was rejected, restarting it would only be rejected again
+AUTHENTICATION_FAILED = 3
+
+
+class ShardMessage:
+
+    __slots__ = ('shard', 'line', 'command', 'result', '_message')
+
+    def __init__(self, shard, line, command=None, result=None):
+        """
+        Chat message or command result forwarded from a shard to the parent process
+
+        :param shard: Index of the shard which received the message
+        :param line: Raw IRC line
+        :param command: First name of the command which produced the result, None for forwarded messages
+        :param result: Return value of the command callback
+        """
+        self.shard = shard
+        self.line = line
+        self.command = command
+        self.result = result
+        self._message = None
+
+    @property
+    def message(self):
+        """
+        :return: Message parsed from the line on first access. Replying is not possible from the parent.
+        """
+        if self._message is None:
+            self._message = Message(None, self.line)
+
+        return self._message
+
+    def __getstate__(self):
+        return self.shard, self.line, self.command, self.result
+
+    def __setstate__(self, state):
+        self.shard, self.line, self.command, self.result = state
+        self._message = None
+
+
+class _ShardChat(MultiTwitchChat):
+
+    def __init__(self, shard, pipe, counters, heartbeats, forward_messages, *args, **kwargs):
+        MultiTwitchChat.__init__(self, *args, **kwargs)
+        self.shard = shard
+        self.pipe = pipe
+        self.counters = counters
+        self.heartbeats = heartbeats
+        self.forward_messages = forward_messages
+        self.offset = shard * len(COUNTERS)
+        self.__lock = threading.Lock()
+
+    def count(self, counter):
+        # Callbacks may run on several threads
+        with self.__lock:
+            self.counters[self.offset + COUNTERS.index(counter)] += 1
+
+    def _heartbeat(self):
+        # Written from the listening loop, so a hung loop stops the heartbeat and gets the shard restarted
+        self.heartbeats[self.shard] = time.time()
+
+    def forward(self, shard_message):
+        with self.__lock:
+            self.pipe.send(shard_message)
+
+    def _process_line(self, line, connection, received_at=None):
+        self.count('lines')
+
+        if ' PRIVMSG ' in line:
+            self.count('messages')
+
+            if self.forward_messages:
+                self.forward(ShardMessage(self.shard, line))
+
+        MultiTwitchChat._process_line(self, line, connection, received_at)
+
+
+def _command_callback(chat, name, callback):
+    def run(msg, matches):
+        chat.count('commands')
+        result = callback(msg, matches)
+
+        if result is not None:
+            chat.count('results')
+            chat.forward(ShardMessage(chat.shard, msg.raw, name, result))
+
+        return result
+
+    return run
+
+
+def _run_shard(shard, shards, token, channels, commands, forward_messages, options, pipe, running, counters, heartbeats):
+    # Twitch limits messages and joins per account, so every shard gets its part of the budget
+    options = dict(options)
+    options.setdefault('joins_per_window', max(1, 20 // shards))
+
+    chat = _ShardChat(shard, pipe, counters, heartbeats, forward_messages, token, channels, **options)
+    chat.sender.limit = max(1, chat.sender.limit // shards)
+
+    for command, callback, prefix, beginning, channel, max_concurrency in commands:
+        name = command[0] if isinstance(command, list) else command
+        chat.register_command(command, _command_callback(chat, name, callback), prefix, beginning, channel, max_concurrency)
+
+    def supervise():
+        while running.value == 1:
+            try:
+                if pipe.poll(1):
+                    action, channel = pipe.recv()
+
+                    if action == 'join':
+                        chat.join(channel)
+                    else:
+                        chat.part(channel)
+            except (EOFError, OSError):
+                # Parent went away
+                break
+
+        chat.stop_listening()
+
+    thread = threading.Thread(target=supervise, daemon=True)
+    thread.start()
+
+    try:
+        chat.listen()
+    except AuthenticationException as e:
+        logger.error("Shard %d failed to authenticate: %s", shard, e)
+        sys.exit(AUTHENTICATION_FAILED)
+
+
+class ShardedTwitchChat:
+
+    def __init__(self, token, channels=None, shards=2, forward_messages=False, heartbeat_timeout=10, restart_delay=1, max_restart_delay=60,
+                 verbose=False, **options):
+        """
+        Chat client spreading channels over worker processes, each listening with its own MultiTwitchChat.
+
+        Channels are assigned to shards by hash, so a channel always lands on the same shard.
+        Command callbacks run in the worker processes, their non-None return values
+        and optionally every chat message are sent back to the parent over a pipe per shard.
+
+        :param token: OAuth token
+        :param channels: Channels to join
+        :param shards: Amount of worker processes
+        :param forward_messages: Send every chat message to the parent, not only command results
+        :param heartbeat_timeout: Seconds without heartbeat after which a shard is restarted
+        :param restart_delay: Seconds to wait before restarting a failed shard, doubled while it keeps failing.
+            Shards whose token is rejected are not restarted.
+        :param max_restart_delay: Maximum seconds to wait before restarting a shard
+        :param verbose: Log shard and connection events to stderr, unless logging is configured already
+        :param options: Passed to MultiTwitchChat, for example channels_per_connection or callback_workers
+        """
+        self.token = token
+        self.shards = shards
+        self.forward_messages = forward_messages
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.verbose = verbose
+        self.options = dict(options, verbose=verbose)
+        configure_logging(verbose, options.get('debug', False))
+        self.running = Value('i', 0)
+
+        self.channels = [set() for _ in range(shards)]
+        self.commands = []
+        self.processes = [None] * shards
+        self.pipes = [None] * shards
+        self.restarts = [0] * shards
+        self.failed = [False] * shards
+        self.counters = RawArray('q', shards * len(COUNTERS))
+        self.heartbeats = RawArray('d', shards)
+
+        self.__listeners = {}
+        self.__thread = None
+        self.__backoffs = [None] * shards
+        self.__started_at = [0.0] * shards
+        self.__restart_at = [None] * shards
+
+        for channel in channels or []:
+            self.join(channel)
+
+    def shard_of(self, channel):
+        """
+        :return: Index of the shard the channel is assigned to
+        """
+        return zlib.crc32(normalize_channel(channel).encode('UTF-8')) % self.shards
+
+    def join(self, channel):
+        channel = normalize_channel(channel)
+        shard = self.shard_of(channel)
+
+        if channel not in self.channels[shard]:
+            self.channels[shard].add(channel)
+            self.__control(shard, 'join', channel)
+
+    def part(self, channel):
+        channel = normalize_channel(channel)
+        shard = self.shard_of(channel)
+
+        if channel in self.channels[shard]:
+            self.channels[shard].discard(channel)
+            self.__control(shard, 'part', channel)
+
+    def __control(self, shard, action, channel):
+        if self.pipes[shard] is not None:
+            try:
+                self.pipes[shard].send((action, channel))
+            except OSError:
+                # The shard is restarted with its current channels by the health check
+                pass
+
+    def register_command(self, command, callback, prefix='!', beginning=True, channel=None, max_concurrency=None):
+        """
+        Register a command on every shard. Has to be called before listening.
+        The callback runs in the worker process, return a value to send it to the parent.
+
+        :param command: Command name or list of aliases
+        :param callback: Function called with the message and matches
+        :param prefix: Command prefix
+        :param beginning: Whether the command has to be at the beginning of the message
+        :param channel: Channel the command applies to, or None for every channel
+        :param max_concurrency: Maximum amount of callbacks of this command running at the same time per shard
+        """
+        if self.running.value == 1:
+            raise Exception("Commands have to be registered before listening")
+
+        self.commands.append((command, callback, prefix, beginning, channel, max_concurrency))
+
+    def on(self, event, callback):
+        """
+        :param event: "message" for forwarded chat messages, "result" for command results,
+            "restart" with the shard index when a shard is restarted
+        :param callback: Function called with the ShardMessage, or the shard index
+        """
+        self.__listeners.setdefault(event, []).append(callback)
+
+    def __emit(self, event, argument):
+        for callback in self.__listeners.get(event, []):
+            try:
+                callback(argument)
+            except Exception:
+                logger.exception("%s listener failed", event)
+
+    def __start_shard(self, shard):
+        parent, child = Pipe()
+        self.heartbeats[shard] = time.time()
+
+        process = Process(target=_run_shard, daemon=True, args=(
+            shard, self.shards, self.token, sorted(self.channels[shard]), self.commands, self.forward_messages,
+            self.options, child, self.running, self.counters, self.heartbeats
+        ))
+        process.start()
+        child.close()
+
+        self.processes[shard] = process
+        self.pipes[shard] = parent
+        self.__started_at[shard] = time.monotonic()
+
+    def __stop_shard(self, shard, timeout):
+        process = self.processes[shard]
+
+        if process is not None:
+            process.join(timeout)
+
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        if self.pipes[shard] is not None:
+            self.pipes[shard].close()
+
+        self.processes[shard] = None
+        self.pipes[shard] = None
+
+    def __check_health(self):
+        if self.running.value == 0:
+            # Shards exit on their own once stopped
+            return
+
+        now = time.time()
+
+        for shard in range(self.shards):
+            if self.failed[shard]:
+                continue
+
+            if self.__restart_at[shard] is not None:
+                if time.monotonic() >= self.__restart_at[shard]:
+                    self.__restart_at[shard] = None
+                    self.__start_shard(shard)
+                    self.restarts[shard] += 1
+                    self.__emit('restart', shard)
+
+                continue
+
+            process = self.processes[shard]
+
+            if process.is_alive() and now - self.heartbeats[shard] < self.heartbeat_timeout:
+                continue
+
+            process.terminate()
+            self.__stop_shard(shard, 0)
+
+            if process.exitcode == AUTHENTICATION_FAILED:
+                logger.error("Shard %d failed to authenticate, not restarting it", shard)
+                self.failed[shard] = True
+                continue
+
+            # A shard which ran for a while before failing starts over with the shortest delay
+            if self.__backoffs[shard] is None or time.monotonic() - self.__started_at[shard] >= self.max_restart_delay:
+                self.__backoffs[shard] = Backoff(self.restart_delay, self.max_restart_delay)
+
+            delay = self.__backoffs[shard].next()
+            self.__restart_at[shard] = time.monotonic() + delay
+
+            logger.warning("Restarting shard %d in %.1f seconds", shard, delay)
+
+    def __receive(self):
+        pipes = {pipe: shard for shard, pipe in enumerate(self.pipes) if pipe is not None}
+
+        for pipe in multiprocessing.connection.wait(list(pipes), timeout=1):
+            try:
+                shard_message = pipe.recv()
+            except (EOFError, OSError):
+                # The worker died, its pipe is replaced by the health check
+                self.pipes[pipes[pipe]] = None
+                continue
+
+            self.__emit('message' if shard_message.command is None else 'result', shard_message)
+
+    def listen(self, async_=False):
+        """
+        Start the worker processes and dispatch what they send back until stop_listening() is called
+
+        :param async_: Dispatch on a background thread
+        """
+        if async_:
+            self.__thread = threading.Thread(target=self.listen, daemon=True)
+            self.__thread.start()
+            return
+
+        self.running.value = 1
+
+        for shard in range(self.shards):
+            self.__start_shard(shard)
+
+        try:
+            while self.running.value == 1:
+                self.__receive()
+                self.__check_health()
+
+                if all(self.failed):
+                    raise AuthenticationException("Every shard failed to authenticate")
+        finally:
+            self.running.value = 0
+
+            for shard in range(self.shards):
+                self.__stop_shard(shard, 5)
+
+    def stop_listening(self, wait=True):
+        """
+        Stop the worker processes, giving them a few seconds to leave their connections before terminating them
+
+        :param wait: Wait until all workers stopped
+        """
+        self.running.value = 0
+
+        if wait and self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def stats(self):
+        """
+        :return: List of per-shard dictionaries with liveness, heartbeat age, restarts and throughput counters
+        """
+        now = time.time()
+        stats = []
+
+        for shard in range(self.shards):
+            process = self.processes[shard]
+            offset = shard * len(COUNTERS)
+            entry = {
+                'alive': process is not None and process.is_alive(),
+                'channels': len(self.channels[shard]),
+                'heartbeat_age': now - self.heartbeats[shard] if self.heartbeats[shard] else None,
+                'restarts': self.restarts[shard],
+                'failed': self.failed[shard]
+            }
+
+            for index, name in enumerate(COUNTERS):
+                entry[name] = self.counters[offset + index]
+
+            stats.append(entry)
+
+        return stats
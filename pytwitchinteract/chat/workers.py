@@ -0,0 +1,210 @@
+from collections import deque
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+
+def run_command(command, message, matches, metrics=None):
+    """
+    Run a command callback, recording the latency since the message was received and the callback duration
+    """
+    if metrics is None:
+        return command.callback(message, matches)
+
+    name = command.command[0]
+    start = time.time()
+
+    if message.received_at is not None:
+        metrics.observe('chat_dispatch_latency_seconds', start - message.received_at, command=name)
+
+    metrics.increment('chat_commands_total', command=name)
+
+    try:
+        return command.callback(message, matches)
+    finally:
+        metrics.observe('chat_callback_seconds', time.time() - start, command=name)
+
+
+class CallbackPool:
+
+    def __init__(self, workers=1, queue_size=1000, overflow='block', metrics=None):
+        """
+        Bounded pool of threads running command callbacks outside of the socket reading loop
+
+        :param workers: Amount of worker threads
+        :param queue_size: Maximum amount of callbacks waiting to run
+        :param overflow: What to do with a full queue:
+            "block" waits for space, "drop_oldest" discards the longest waiting callback,
+            "drop_newest" discards the callback being submitted
+        :param metrics: Metrics recording callback durations and dropped callbacks
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise Exception("Overflow policy must be one of {}".format(", ".join(OVERFLOW_POLICIES)))
+
+        self.workers = workers
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.metrics = metrics
+        self.running = False
+
+        self.submitted = 0
+        self.executed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+        self.__queue = deque()
+        self.__size = 0
+        self.__active = {}
+        self.__backlog = {}
+        self.__threads = []
+        self.__condition = threading.Condition()
+
+    def start(self):
+        with self.__condition:
+            if self.running:
+                return
+
+            self.running = True
+
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self.__work, daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def stop(self, wait=True):
+        """
+        :param wait: Wait for the queued callbacks to finish
+        """
+        with self.__condition:
+            self.running = False
+
+            if not wait:
+                self.__queue.clear()
+                self.__backlog.clear()
+                self.__size = 0
+
+            self.__condition.notify_all()
+
+        if wait:
+            for thread in self.__threads:
+                thread.join()
+
+        self.__threads = []
+
+    def submit(self, command, message, matches):
+        """
+        Queue command.callback(message, matches)
+
+        :return: False if the callback was dropped
+        """
+        task = (command, message, matches, time.monotonic())
+
+        with self.__condition:
+            self.submitted += 1
+
+            while self.__size >= self.queue_size:
+                if self.overflow == 'drop_newest' or (self.overflow == 'drop_oldest' and len(self.__queue) == 0):
+                    self.__drop()
+                    return False
+
+                if self.overflow == 'drop_oldest':
+                    self.__queue.popleft()
+                    self.__size -= 1
+                    self.__drop()
+                else:
+                    self.__condition.wait()
+
+            self.__queue.append(task)
+            self.__size += 1
+            self.__condition.notify_all()
+
+        return True
+
+    def __drop(self):
+        self.dropped += 1
+
+        if self.metrics is not None:
+            self.metrics.increment('chat_callbacks_dropped_total')
+
+    def __next(self):
+        with self.__condition:
+            while True:
+                while self.__queue:
+                    task = self.__queue.popleft()
+                    command = task[0]
+                    limit = getattr(command, 'max_concurrency', None)
+
+                    if limit is not None and self.__active.get(command, 0) >= limit:
+                        # Parked until one of the running callbacks of this command finishes
+                        self.__backlog.setdefault(command, deque()).append(task)
+                        continue
+
+                    self.__active[command] = self.__active.get(command, 0) + 1
+                    self.__size -= 1
+                    self.__condition.notify_all()
+
+                    return task
+
+                if not self.running:
+                    return None
+
+                self.__condition.wait()
+
+    def __done(self, command):
+        with self.__condition:
+            self.__active[command] -= 1
+
+            backlog = self.__backlog.get(command)
+
+            if backlog:
+                self.__queue.appendleft(backlog.popleft())
+
+                if not backlog:
+                    del self.__backlog[command]
+
+            self.__condition.notify_all()
+
+    def __work(self):
+        while True:
+            task = self.__next()
+
+            if task is None:
+                return
+
+            command, message, matches, submitted_at = task
+            lag = time.monotonic() - submitted_at
+
+            try:
+                run_command(command, message, matches, self.metrics)
+            except Exception:
+                self.failed += 1
+                logger.exception("Command callback failed")
+            finally:
+                self.__done(command)
+
+            with self.__condition:
+                self.executed += 1
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+
+    def stats(self):
+        """
+        :return: Dictionary of pool metrics, lag is the time callbacks waited in the queue
+        """
+        with self.__condition:
+            return {
+                'queue_depth': self.__size,
+                'submitted': self.submitted,
+                'executed': self.executed,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'average_lag': self.total_lag / self.executed if self.executed > 0 else 0.0,
+                'max_lag': self.max_lag
+            }
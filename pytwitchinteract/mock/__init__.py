@@ -0,0 +1,4 @@
+from .server import MockServer
+from .helix import MockHelixServer
+from .tmi import MockTMIServer
+from .harness import chat_benchmark
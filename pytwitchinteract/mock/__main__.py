@@ -0,0 +1,55 @@
+"""
+Usage:
+    python -m pytwitchinteract.mock helix [--port 8080] [--total 1000] [--rate-limit 800] [--latency 0]
+    python -m pytwitchinteract.mock tmi [--port 6667] [--rate 100] [--command-ratio 0]
+    python -m pytwitchinteract.mock bench [--rate 1000] [--duration 10] [--command-ratio 0.1] [--callback-workers 1] [--reply]
+"""
+from pytwitchinteract.mock import MockHelixServer, MockTMIServer, chat_benchmark
+
+import argparse
+import asyncio
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m pytwitchinteract.mock')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    helix = commands.add_parser('helix', help='Run a mock Helix API')
+    helix.add_argument('--host', default='127.0.0.1')
+    helix.add_argument('--port', type=int, default=8080)
+    helix.add_argument('--total', type=int, default=1000)
+    helix.add_argument('--rate-limit', type=int, default=800)
+    helix.add_argument('--latency', type=float, default=0)
+
+    tmi = commands.add_parser('tmi', help='Run a mock chat server')
+    tmi.add_argument('--host', default='127.0.0.1')
+    tmi.add_argument('--port', type=int, default=6667)
+    tmi.add_argument('--rate', type=int, default=100)
+    tmi.add_argument('--command-ratio', type=float, default=0)
+
+    bench = commands.add_parser('bench', help='Measure chat throughput and command dispatch latency')
+    bench.add_argument('--rate', type=int, default=1000)
+    bench.add_argument('--duration', type=float, default=10)
+    bench.add_argument('--command-ratio', type=float, default=0.1)
+    bench.add_argument('--callback-workers', type=int, default=1)
+    bench.add_argument('--reply', action='store_true')
+
+    args = parser.parse_args()
+
+    if args.command == 'helix':
+        server = MockHelixServer(args.host, args.port, total=args.total, rate_limit=args.rate_limit, latency=args.latency)
+        print("Mock Helix listening on http://{}:{}/helix".format(args.host, args.port))
+        asyncio.run(server.serve_forever())
+    elif args.command == 'tmi':
+        server = MockTMIServer(args.host, args.port, rate=args.rate, command_ratio=args.command_ratio)
+        print("Mock TMI listening on {}:{}".format(args.host, args.port))
+        asyncio.run(server.serve_forever())
+    else:
+        results = chat_benchmark(args.rate, args.duration, args.command_ratio, args.callback_workers, reply=args.reply)
+
+        for name, value in results.items():
+            print("{:<20} {}".format(name, "{:,.3f}".format(value) if isinstance(value, float) else value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+from pytwitchinteract.chat import TwitchChat
+from pytwitchinteract.mock.tmi import MockTMIServer
+
+import threading
+import time
+
+
+class _CountingChat(TwitchChat):
+
+    def __init__(self, *args, **kwargs):
+        TwitchChat.__init__(self, *args, **kwargs)
+        self.received = 0
+
+    def _process_line(self, line, received_at=None):
+        if ' PRIVMSG ' in line:
+            self.received += 1
+
+        TwitchChat._process_line(self, line, received_at)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def chat_benchmark(rate=1000, duration=10, command_ratio=0.1, callback_workers=1, channel='benchmark', reply=False):
+    """
+    Flood a TwitchChat from a local MockTMIServer and measure end-to-end throughput and command dispatch latency.
+
+    :param rate: Messages per second sent by the server
+    :param duration: Seconds to measure
+    :param command_ratio: Share of the messages which are !ping commands
+    :param callback_workers: Passed to TwitchChat
+    :param channel: Channel to join
+    :param reply: Reply to every command, which also exercises the send queue
+
+    :return: Dictionary of results, latencies in milliseconds
+    """
+    server = MockTMIServer(rate=rate, command_ratio=command_ratio)
+    port = server.start_in_thread()
+    latencies = []
+
+    def ping(message, matches):
+        # Content is "!ping <server time.monotonic()>"
+        latencies.append(time.monotonic() - float(message.content.split(' ', 1)[1]))
+
+        if reply:
+            message.reply('pong')
+
+    chat = _CountingChat('benchmark', channel, host=server.host, port=port, callback_workers=callback_workers)
+    chat.register_command('ping', ping)
+
+    thread = threading.Thread(target=chat.listen, daemon=True)
+    thread.start()
+
+    time.sleep(duration)
+
+    sent = server.sent
+    received = chat.received
+    dispatched = len(latencies)
+
+    chat.stop_listening()
+    thread.join()
+    server.stop_thread()
+
+    return {
+        'rate': rate,
+        'duration': duration,
+        'sent': sent,
+        'received': received,
+        'throughput': received / duration,
+        'commands_sent': server.commands_sent,
+        'commands_dispatched': dispatched,
+        'latency_p50': _percentile(latencies, 0.5) * 1000 if latencies else None,
+        'latency_p99': _percentile(latencies, 0.99) * 1000 if latencies else None,
+        'latency_max': max(latencies) * 1000 if latencies else None,
+        'callbacks': chat.callback_stats()
+    }
@@ -0,0 +1,202 @@
+from pytwitchinteract.mock.server import MockServer
+
+import asyncio
+import base64
+import gzip
+import json
+import time
+import urllib.parse
+
+
+def _game(i):
+    return {'id': str(i), 'name': 'Game {}'.format(i), 'box_art_url': 'https://static-cdn.jtvnw.net/ttv-boxart/{}-{{width}}x{{height}}.jpg'.format(i)}
+
+
+def _user(i, login=None):
+    login = login or 'user{}'.format(i)
+    return {'id': str(i), 'login': login, 'display_name': login.capitalize(), 'type': '', 'broadcaster_type': 'partner' if i % 10 == 0 else '',
+            'description': 'Mock streamer {}'.format(i), 'profile_image_url': '', 'offline_image_url': '', 'view_count': i * 37}
+
+
+def _stream(i):
+    return {'id': str(10 ** 9 + i), 'user_id': str(i), 'game_id': str(i % 50), 'community_ids': [], 'type': 'live',
+            'title': 'Mock stream {}'.format(i), 'viewer_count': max(100000 // (i + 1), 1), 'started_at': '2018-01-01T00:00:00Z',
+            'language': 'en' if i % 3 else 'de', 'thumbnail_url': 'https://static-cdn.jtvnw.net/previews-ttv/live_user_user{}-{{width}}x{{height}}.jpg'.format(i)}
+
+
+def _metadata(i):
+    return {'user_id': str(i), 'game_id': str(i % 50), 'overwatch': None, 'hearthstone': None}
+
+
+def _follow(i, to_id):
+    return {'from_id': str(100000 + i), 'to_id': to_id, 'followed_at': '2018-01-01T00:00:00Z'}
+
+
+def _video(i, user_id):
+    return {'id': str(2 * 10 ** 8 + i), 'user_id': user_id, 'title': 'Mock video {}'.format(i), 'description': '',
+            'created_at': '2018-01-01T00:00:00Z', 'published_at': '2018-01-01T00:00:00Z', 'thumbnail_url': '',
+            'view_count': 1000 - i % 1000, 'language': 'en'}
+
+
+def _cursor(offset):
+    return base64.b64encode('{{"o":{}}}'.format(offset).encode('ascii')).decode('ascii')
+
+
+def _offset(cursor):
+    return json.loads(base64.b64decode(cursor))['o']
+
+
+class MockHelixServer(MockServer):
+
+    def __init__(self, host='127.0.0.1', port=0, total=1000, rate_limit=800, rate_window=60, latency=0):
+        """
+        Stand-in for api.twitch.tv/helix serving deterministic data for the endpoints Twitch calls,
+        with cursor pagination and Ratelimit-* headers. Point Twitch(api_host='http://host:port') at it.
+
+        :param host: Host to bind to
+        :param port: Port to bind to, 0 picks a free port
+        :param total: Amount of items of the paginated endpoints
+        :param rate_limit: Requests allowed per rate window, answered with 429 once used up
+        :param rate_window: Seconds it takes for the rate limit bucket to refill
+        :param latency: Seconds every response is delayed by
+        """
+        MockServer.__init__(self, host, port)
+        self.total = total
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.latency = latency
+
+        self.requests = 0
+        self.limited = 0
+
+        self.__tokens = float(rate_limit)
+        self.__updated = time.monotonic()
+
+    def __take_token(self):
+        now = time.monotonic()
+        self.__tokens = min(float(self.rate_limit), self.__tokens + (now - self.__updated) * self.rate_limit / self.rate_window)
+        self.__updated = now
+
+        if self.__tokens < 1:
+            return False
+
+        self.__tokens -= 1
+        return True
+
+    def __rate_headers(self):
+        reset = time.time() + (self.rate_limit - self.__tokens) * self.rate_window / self.rate_limit
+
+        return {
+            'Ratelimit-Limit': str(self.rate_limit),
+            'Ratelimit-Remaining': str(int(self.__tokens)),
+            'Ratelimit-Reset': str(int(reset))
+        }
+
+    def __page(self, query, row):
+        size = min(int((query.get('first') or query.get('amount') or ['20'])[0]), 100)
+        offset = 0
+
+        if 'after' in query:
+            offset = _offset(query['after'][0])
+        elif 'before' in query:
+            offset = max(_offset(query['before'][0]) - 2 * size, 0)
+
+        end = min(offset + size, self.total)
+        data = [row(i) for i in range(offset, end)]
+
+        return {'data': data, 'pagination': {'cursor': _cursor(end)} if end < self.total else {}}
+
+    def respond(self, method, path, query):
+        """
+        :return: Tuple of the status and the JSON document to answer with
+        """
+        if path.startswith('/helix'):
+            path = path[6:]
+
+        if path == '/games':
+            ids = query.get('id', [])
+            names = query.get('name', [])
+            return 200, {'data': [_game(int(i)) for i in ids if i.isdigit()] + [dict(_game(len(name)), name=name) for name in names]}
+
+        if path == '/users' and method == 'PUT':
+            return 200, {'data': [dict(_user(1), description=query.get('description', [''])[0])]}
+
+        if path == '/users':
+            ids = query.get('id', [])
+            logins = query.get('login', [])
+            return 200, {'data': [_user(int(i)) for i in ids if i.isdigit()] +
+                                 [_user(int(login[4:]) if login[4:].isdigit() else len(login), login) for login in logins]}
+
+        if path in ('/streams', '/streams/metadata'):
+            row = _stream if path == '/streams' else _metadata
+
+            if 'user_id' in query:
+                return 200, {'data': [row(int(i)) for i in query['user_id'] if i.isdigit() and int(i) < self.total], 'pagination': {}}
+
+            return 200, self.__page(query, row)
+
+        if path == '/users/follows':
+            to_id = query.get('to_id', query.get('from_id', ['1']))[0]
+            return 200, self.__page(query, lambda i: _follow(i, to_id))
+
+        if path == '/videos':
+            user_id = query.get('user_id', ['1'])[0]
+            return 200, self.__page(query, lambda i: _video(i, user_id))
+
+        return 404, {'error': 'Not Found', 'status': 404, 'message': 'Unknown endpoint {}'.format(path)}
+
+    async def _handle(self, reader, writer):
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('iso-8859-1').split('\r\n')
+            method, target, _ = lines[0].split(' ', 2)
+            headers = {}
+
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            if 'content-length' in headers:
+                await reader.readexactly(int(headers['content-length']))
+
+            self.requests += 1
+            url = urllib.parse.urlsplit(target)
+            query = urllib.parse.parse_qs(url.query)
+
+            if 'authorization' not in headers:
+                status, document = 401, {'error': 'Unauthorized', 'status': 401, 'message': 'OAuth token is missing'}
+            elif not self.__take_token():
+                self.limited += 1
+                status, document = 429, {'error': 'Too Many Requests', 'status': 429, 'message': 'Rate limit exceeded'}
+            else:
+                status, document = self.respond(method, url.path, query)
+
+            if self.latency > 0:
+                await asyncio.sleep(self.latency)
+
+            body = json.dumps(document).encode('UTF-8')
+            response_headers = self.__rate_headers()
+            response_headers['Content-Type'] = 'application/json'
+
+            if 'gzip' in headers.get('accept-encoding', ''):
+                body = gzip.compress(body, 1)
+                response_headers['Content-Encoding'] = 'gzip'
+
+            response_headers['Content-Length'] = str(len(body))
+            reason = {200: 'OK', 401: 'Unauthorized', 404: 'Not Found', 429: 'Too Many Requests'}[status]
+
+            writer.write('HTTP/1.1 {} {}\r\n{}\r\n\r\n'.format(
+                status, reason, '\r\n'.join('{}: {}'.format(name, value) for name, value in response_headers.items())
+            ).encode('iso-8859-1') + body)
+            await writer.drain()
+
+            if headers.get('connection', '').lower() == 'close':
+                return
+
+    def stats(self):
+        return {
+            'connections': self.connections,
+            'requests': self.requests,
+            'limited': self.limited
+        }
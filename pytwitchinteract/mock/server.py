@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+
+class MockServer:
+
+    def __init__(self, host='127.0.0.1', port=0):
+        """
+        Base of the asyncio mock servers, which can be run on a running event loop or on a background thread
+
+        :param host: Host to bind to
+        :param port: Port to bind to, 0 picks a free port
+        """
+        self.host = host
+        self.port = port
+        self.server = None
+        self.connections = 0
+
+        self.__handlers = {}
+        self.__loop = None
+        self.__thread = None
+
+    async def _handle(self, reader, writer):
+        raise NotImplementedError()
+
+    async def __handle(self, reader, writer):
+        self.connections += 1
+        self.__handlers[writer] = asyncio.current_task()
+
+        try:
+            await self._handle(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.__handlers.pop(writer, None)
+            writer.close()
+
+    async def start(self):
+        """
+        Start listening on the running event loop
+
+        :return: Bound port
+        """
+        self.server = await asyncio.start_server(self.__handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+        return self.port
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+
+            handlers = list(self.__handlers.values())
+
+            # Handlers exit once their reads see the closed connection
+            for writer in list(self.__handlers):
+                writer.close()
+
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    async def serve_forever(self):
+        await self.start()
+        await self.server.serve_forever()
+
+    def start_in_thread(self):
+        """
+        Run the server on its own event loop in a daemon thread
+
+        :return: Bound port
+        """
+        started = threading.Event()
+
+        def run():
+            self.__loop = asyncio.new_event_loop()
+            self.__loop.run_until_complete(self.start())
+            started.set()
+            self.__loop.run_forever()
+            self.__loop.run_until_complete(self.stop())
+            self.__loop.close()
+
+        self.__thread = threading.Thread(target=run, daemon=True)
+        self.__thread.start()
+        started.wait()
+
+        return self.port
+
+    def stop_thread(self):
+        if self.__thread is not None:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+            self.__thread = None
@@ -0,0 +1,156 @@
+from pytwitchinteract.mock.server import MockServer
+
+import asyncio
+import random
+import time
+
+
+WORDS = ['hello', 'stream', 'PogChamp', 'LUL', 'Kappa', 'nice', 'play', 'what', 'was', 'that', 'gg', 'wp', 'chat', 'the', 'is']
+
+# Content of command messages, the harness measures dispatch latency from the embedded send time
+PING_COMMAND = '!ping'
+
+
+class MockTMIServer(MockServer):
+
+    def __init__(self, host='127.0.0.1', port=0, rate=100, command_ratio=0.0, ping_interval=60, users=1000, seed=0):
+        """
+        Stand-in for irc.twitch.tv, accepting any token and flooding joined channels with synthetic PRIVMSG traffic.
+        Point TwitchChat(host=..., port=...) at it.
+
+        A command_ratio share of the messages are "!ping <time.monotonic()>", so a client on the same machine
+        can measure the latency from writing a message to dispatching its command.
+
+        :param host: Host to bind to
+        :param port: Port to bind to, 0 picks a free port
+        :param rate: Messages per second sent over each connection, spread over its joined channels
+        :param command_ratio: Share of the messages which are !ping commands
+        :param ping_interval: Seconds between PINGs
+        :param users: Amount of distinct synthetic chatters
+        :param seed: Seed of the synthetic traffic
+        """
+        MockServer.__init__(self, host, port)
+        self.rate = rate
+        self.command_ratio = command_ratio
+        self.ping_interval = ping_interval
+        self.users = users
+
+        self.sent = 0
+        self.commands_sent = 0
+        self.pongs = 0
+
+        # (channel, message, time.monotonic()) of PRIVMSGs sent by clients
+        self.received = []
+
+        self.__random = random.Random(seed)
+
+    def __line(self, channel, tags):
+        user_id = self.__random.randrange(self.users)
+        user = 'user{}'.format(user_id)
+
+        if self.__random.random() < self.command_ratio:
+            content = '{} {:.6f}'.format(PING_COMMAND, time.monotonic())
+            self.commands_sent += 1
+        else:
+            content = ' '.join(self.__random.choice(WORDS) for _ in range(self.__random.randint(1, 12)))
+
+        line = ':{0}!{0}@{0}.tmi.twitch.tv PRIVMSG {1} :{2}\r\n'.format(user, channel, content)
+
+        if tags:
+            line = '@badge-info=;badges=;color=;display-name={};emotes=;id={:08x};mod=0;subscriber=0;tmi-sent-ts={};user-id={};user-type= {}'.format(
+                user, self.__random.getrandbits(32), int(time.time() * 1000), user_id, line
+            )
+
+        return line
+
+    async def __flood(self, writer, channels, capabilities):
+        due = 0.0
+        last_ping = last_tick = time.monotonic()
+
+        while not writer.is_closing():
+            await asyncio.sleep(0.01)
+
+            now = time.monotonic()
+            elapsed = now - last_tick
+            last_tick = now
+
+            if now - last_ping >= self.ping_interval:
+                writer.write(b'PING :tmi.twitch.tv\r\n')
+                last_ping = now
+
+            if not channels:
+                continue
+
+            # Sleeps overshoot under load, so the messages owed are based on the actual time passed
+            due += self.rate * elapsed
+            count = int(due)
+            due -= count
+
+            if count == 0:
+                continue
+
+            joined = list(channels)
+            tags = 'twitch.tv/tags' in capabilities
+            lines = [self.__line(joined[(self.sent + i) % len(joined)], tags) for i in range(count)]
+
+            writer.write(''.join(lines).encode('UTF-8'))
+            self.sent += count
+            await writer.drain()
+
+    async def _handle(self, reader, writer):
+        channels = set()
+        capabilities = set()
+        nick = 'justinfan'
+        flood = None
+
+        def send(line):
+            writer.write((line + '\r\n').encode('UTF-8'))
+
+        try:
+            while True:
+                line = (await reader.readuntil(b'\r\n')).decode('UTF-8', 'replace')[:-2]
+                command, _, argument = line.partition(' ')
+
+                if command == 'CAP' and argument.startswith('REQ'):
+                    requested = argument.split(':', 1)[1].split()
+                    capabilities.update(requested)
+                    send(':tmi.twitch.tv CAP * ACK :{}'.format(' '.join(requested)))
+                elif command == 'NICK':
+                    nick = argument.strip().lower()
+
+                    for code, text in (('001', 'Welcome, GLHF!'), ('002', 'Your host is tmi.twitch.tv'), ('003', 'This server is rather new'),
+                                       ('004', '-'), ('375', '-'), ('372', 'You are in a maze of twisty passages, all alike.'), ('376', '>')):
+                        send(':tmi.twitch.tv {} {} :{}'.format(code, nick, text))
+
+                    flood = asyncio.ensure_future(self.__flood(writer, channels, capabilities))
+                elif command == 'JOIN':
+                    for channel in argument.split(','):
+                        channels.add(channel)
+                        send(':{0}!{0}@{0}.tmi.twitch.tv JOIN {1}'.format(nick, channel))
+
+                        if 'twitch.tv/tags' in capabilities and 'twitch.tv/commands' in capabilities:
+                            send('@emote-only=0;followers-only=-1;r9k=0;rituals=0;room-id=1;slow=0;subs-only=0 :tmi.twitch.tv ROOMSTATE {}'.format(channel))
+                elif command == 'PART':
+                    channels.discard(argument)
+                    send(':{0}!{0}@{0}.tmi.twitch.tv PART {1}'.format(nick, argument))
+                elif command == 'PRIVMSG':
+                    channel, _, message = argument.partition(' :')
+                    self.received.append((channel, message, time.monotonic()))
+                elif command == 'PONG':
+                    self.pongs += 1
+                elif command == 'PING':
+                    send('PONG :tmi.twitch.tv')
+
+                await writer.drain()
+        finally:
+            if flood is not None:
+                flood.cancel()
+
+    def stats(self):
+        return {
+            'connections': self.connections,
+            'sent': self.sent,
+            'commands_sent': self.commands_sent,
+            'received': len(self.received),
+            'pongs': self.pongs
+        }
@@ -1,5 +1,7 @@
 class Follow:
 
+    __slots__ = ('from_id', 'to_id', 'followed_at', 'twitch')
+
     @staticmethod
     def from_json(data, twitch):
         return Follow(
@@ -25,10 +27,10 @@ class Follow:
         """
         :return: User
         """
-        return self.twitch.get_users(id=self.from_id)
+        return self.twitch._then(self.twitch.load_users([self.from_id]), lambda users: list(users.values()))
 
     def get_to_user(self):
         """
         :return: User
         """
-        return self.twitch.get_users(id=self.to_id)
+        return self.twitch._then(self.twitch.load_users([self.to_id]), lambda users: list(users.values()))
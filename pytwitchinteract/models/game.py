@@ -1,5 +1,7 @@
 class Game:
 
+    __slots__ = ('id', 'name', 'box_art_url', 'twitch')
+
     @staticmethod
     def from_json(data, twitch):
         return Game(
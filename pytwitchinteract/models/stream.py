@@ -1,5 +1,7 @@
 class Stream:
 
+    __slots__ = ('id', 'user_id', 'game_id', 'community_ids', 'type', 'title', 'viewer_count', 'started_at', 'language', 'thumbnail_url', 'twitch')
+
     @staticmethod
     def from_json(data, twitch):
         return Stream(
@@ -48,19 +50,19 @@ class Stream:
         """
         :return: User
         """
-        return self.twitch.get_users(id=self.user_id)[0]
+        return self.twitch._then(self.twitch.load_users([self.user_id]), lambda users: users[self.user_id])
 
     def get_game(self):
         """
         :return: Game or None
         """
         if self.game_id is None or self.game_id == "":
-            return None
+            return self.twitch._resolved(None)
 
-        return self.twitch.get_games(id=self.game_id)[0]
+        return self.twitch._then(self.twitch.load_games([self.game_id]), lambda games: games[self.game_id])
 
     def get_metadata(self):
         """
         :return: StreamMetadata
         """
-        return self.twitch.get_streams_metadata(user_id=self.user_id).data[0]
+        return self.twitch._then(self.twitch.get_streams_metadata(user_id=self.user_id), lambda response: response.data[0])
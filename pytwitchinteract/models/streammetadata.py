@@ -1,5 +1,7 @@
 class StreamMetadata:
 
+    __slots__ = ('user_id', 'game_id', 'overwatch', 'hearthstone', 'twitch')
+
     @staticmethod
     def from_json(data, twitch):
         return StreamMetadata(
@@ -31,13 +33,13 @@ class StreamMetadata:
         """
         :return: Stream
         """
-        return self.twitch.get_streams(user_id=self.user_id).data[0]
+        return self.twitch._then(self.twitch.get_streams(user_id=self.user_id), lambda response: response.data[0])
 
     def get_game(self):
         """
         :return: Game or None
         """
         if self.game_id is None:
-            return None
+            return self.twitch._resolved(None)
 
-        return self.twitch.get_games(id=self.game_id)
+        return self.twitch._then(self.twitch.load_games([self.game_id]), lambda games: list(games.values()))
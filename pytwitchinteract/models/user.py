@@ -1,5 +1,7 @@
 class User:
 
+    __slots__ = ('id', 'login', 'display_name', 'type', 'broadcaster_type', 'description', 'profile_image_url', 'offline_image_url', 'view_count', 'twitch')
+
     @staticmethod
     def from_json(data, twitch):
         return User(
@@ -43,13 +45,13 @@ class User:
         """
         :return: Stream
         """
-        return self.twitch.get_streams(user_id=self.id).data[0]
+        return self.twitch._then(self.twitch.get_streams(user_id=self.id), lambda response: response.data[0])
 
     def get_stream_metadata(self):
         """
         :return: StreamMetadata
         """
-        return self.twitch.get_streams_metadata(user_id=self.id).data[0]
+        return self.twitch._then(self.twitch.get_streams_metadata(user_id=self.id), lambda response: response.data[0])
 
     def get_followers(self):
         """
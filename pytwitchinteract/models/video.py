@@ -1,5 +1,7 @@
 class Video:
 
+    __slots__ = ('id', 'user_id', 'title', 'description', 'created_at', 'published_at', 'thumbnail_url', 'view_count', 'language', 'twitch')
+
     @staticmethod
     def from_json(data, twitch):
         return Video(
@@ -43,4 +45,4 @@ class Video:
         """
         :return: User
         """
-        return self.twitch.get_users(id=self.user_id)[0]
+        return self.twitch._then(self.twitch.load_users([self.user_id]), lambda users: users[self.user_id])
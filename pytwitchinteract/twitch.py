@@ -1,21 +1,82 @@
-from pytwitchinteract.utils import PaginatedResponse
+from pytwitchinteract.utils import PaginatedResponse, ConnectionPool, LookupBatch, RateLimiter, FanOut
+from pytwitchinteract.utils.batching import REFERENCES, collect_ids
+from pytwitchinteract.utils.decoder import default_decoder
+from pytwitchinteract.utils.metrics import SIZE_BUCKETS
 from pytwitchinteract.models import *
 
-import http.client
-import json
+from contextlib import contextmanager
+import contextvars
+import random
+import threading
+import time
 import urllib.parse
 
 
+# Seconds to cache responses of each endpoint for, when a cache is configured
+DEFAULT_CACHE_TTL = {
+    '/games': 3600,
+    '/users': 300
+}
+
+
 class Twitch:
 
-    def __init__(self, token=None, api_host='https://api.twitch.tv', api_base='/helix'):
+    def __init__(self, token=None, api_host='https://api.twitch.tv', api_base='/helix', pool_size=10, timeout=10, cache=None, cache_ttl=None,
+                 rate_limiter=None, max_retries=3, retry_backoff=0.5, decoder=None, compression=True, transport=None, metrics=None):
+        """
+        :param token: OAuth token
+        :param api_host: Scheme and host of the API
+        :param api_base: Base path of the API
+        :param pool_size: Maximum number of keep-alive connections to the API host
+        :param timeout: Socket timeout in seconds
+        :param cache: Response cache, such as MemoryCache or SqliteCache
+        :param cache_ttl: Dictionary of endpoint to seconds, overriding DEFAULT_CACHE_TTL.
+            Endpoints without a TTL are not cached
+        :param rate_limiter: RateLimiter shared by all requests.
+            Default: a new RateLimiter, False disables rate limiting
+        :param max_retries: Amount of times a request is retried on 429 and 5xx responses
+        :param retry_backoff: Base delay in seconds between retries, doubled on every attempt
+        :param decoder: Function decoding JSON response bodies.
+            Default: orjson or ujson when installed, otherwise json.loads
+        :param compression: Request gzip/deflate compressed responses
+        :param transport: Object performing the HTTP requests, such as RecordingTransport or ReplayTransport.
+            Default: a ConnectionPool to api_host
+        :param metrics: Metrics recording request latency, bytes, status codes, retries and rate limit waits
+        """
         self.api_host = api_host
         self.api_base = api_base
         self.token = None
+        self.cache = cache
+        self.cache_ttl = DEFAULT_CACHE_TTL.copy()
+        self.rate_limiter = RateLimiter() if rate_limiter is None else rate_limiter or None
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retries = 0
+        self.decoder = decoder if decoder is not None else default_decoder()
+        self.compression = compression
+        self.metrics = metrics
+        self.transfers = {}
+        self._transfers_lock = threading.Lock()
+
+        # Per thread and asyncio task, so other callers of this client are not drawn into an open batch
+        self._batch_scope = contextvars.ContextVar('batch_lookups', default=None)
+
+        if cache_ttl is not None:
+            self.cache_ttl.update(cache_ttl)
+
+        if transport is not None:
+            self.pool = transport
+        elif self.api_host[:5] == 'https':
+            self.pool = self._create_pool(self.api_host[8:], True, pool_size, timeout)
+        else:
+            self.pool = self._create_pool(self.api_host[7:], False, pool_size, timeout)
 
         if token is not None:
             self.authenticate(token)
 
+    def _create_pool(self, host, secure, size, timeout):
+        return ConnectionPool(host, secure=secure, size=size, timeout=timeout)
+
     def authenticate(self, token):
         if token[:6] == 'oauth:':
             token = token[6:]
@@ -25,17 +86,43 @@ class Twitch:
 
         self.token = token
 
-    def do_request(self, endpoint, method='GET', query=None, headers=None, body=None):
+    def do_request(self, endpoint, method='GET', query=None, headers=None, body=None, priority=0):
         """
-        Make a request to the Twitch API
+        Make a request to the Twitch API.
+        Waits for the rate limiter and retries 429 and 5xx responses with jittered backoff.
 
         :param endpoint: Endpoint which to request
         :param method: The method to use
         :param query: Dictionary of query elements
         :param headers: Dictionary of headers
         :param body: Body string
+        :param priority: Requests with a higher priority are sent first when rate limited
+
+        :return: BufferedResponse
+        """
+        url, headers = self._prepare_request(endpoint, query, headers)
+        attempt = 0
+
+        while True:
+            start = time.perf_counter()
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(priority)
+
+            sent = time.perf_counter()
+            response = self.pool.request(method, url, body, headers)
 
-        :return: The response
+            delay = self._handle_response(endpoint, response, attempt, sent - start, time.perf_counter() - sent)
+
+            if delay is None:
+                return response
+
+            attempt += 1
+            time.sleep(delay)
+
+    def _prepare_request(self, endpoint, query, headers):
+        """
+        :return: Tuple of the URL and headers to request
         """
         if query is None:
             query = {}
@@ -50,14 +137,226 @@ class Twitch:
         if self.token is not None:
             headers['Authorization'] = self.token
 
-        if self.api_host[:5] == 'https':
-            connection = http.client.HTTPSConnection(self.api_host[8:], port=443)
-        else:
-            connection = http.client.HTTPConnection(self.api_host[7:], port=80)
+        if self.compression:
+            headers['Accept-Encoding'] = 'gzip, deflate'
+
+        return self.api_base + endpoint, headers
+
+    def _handle_response(self, endpoint, response, attempt, waited=0.0, elapsed=0.0):
+        """
+        Record transfer counters and metrics, feed the rate limiter and decide whether to retry
+
+        :param waited: Seconds spent waiting for the rate limiter
+        :param elapsed: Seconds the request took
+
+        :return: Seconds to wait before retrying, or None to not retry
+        """
+        with self._transfers_lock:
+            transfer = self.transfers.get(endpoint)
+
+            if transfer is None:
+                transfer = self.transfers[endpoint] = {'requests': 0, 'wire_bytes': 0, 'decoded_bytes': 0}
+
+            transfer['requests'] += 1
+            transfer['wire_bytes'] += response.wire_size
+            transfer['decoded_bytes'] += len(response.body)
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(response.headers)
+
+        if self.metrics is not None:
+            self.metrics.observe('helix_request_seconds', elapsed, endpoint=endpoint)
+            self.metrics.observe('helix_rate_limit_wait_seconds', waited, endpoint=endpoint)
+            self.metrics.observe('helix_response_bytes', response.wire_size, SIZE_BUCKETS, endpoint=endpoint)
+            self.metrics.increment('helix_responses_total', endpoint=endpoint, status=response.status)
+
+        if (response.status != 429 and response.status < 500) or attempt >= self.max_retries:
+            return None
+
+        self.retries += 1
+
+        if self.metrics is not None:
+            self.metrics.increment('helix_retries_total', endpoint=endpoint)
+
+        delay = self.retry_backoff * (2 ** attempt)
+        reset = response.getheader('Ratelimit-Reset')
+
+        if response.status == 429 and reset is not None:
+            delay = max(delay, int(reset) - time.time())
+
+        return delay * random.uniform(1, 1.5)
+
+    def transfer_stats(self):
+        """
+        :return: Dictionary of endpoint to request count, bytes received (wire_bytes) and bytes after decompression (decoded_bytes)
+        """
+        with self._transfers_lock:
+            return {endpoint: transfer.copy() for endpoint, transfer in self.transfers.items()}
+
+    def rate_limit_stats(self):
+        """
+        :return: Dictionary of rate limiter metrics (queue depth, wait times) or None without a rate limiter
+        """
+        if self.rate_limiter is None:
+            return None
+
+        return self.rate_limiter.stats()
+
+    def close(self):
+        """
+        Close all idle pooled connections
+        """
+        self.pool.close()
+
+    def pool_stats(self):
+        """
+        :return: Dictionary of connection pool counters (handshakes, reuses, stale reconnects)
+        """
+        return self.pool.stats()
+
+    def cache_stats(self):
+        """
+        :return: Dictionary of cache counters (hits, misses, evictions) or None without a cache
+        """
+        if self.cache is None:
+            return None
+
+        return self.cache.stats()
+
+    def fan_out(self, calls, max_workers=None, ordered=False):
+        """
+        Run many method calls concurrently, for example get_streams for 50 game IDs.
+        Results are yielded as they complete, exceptions are captured per call.
+
+        :param calls: Iterable of (method name, keyword arguments) tuples
+        :param max_workers: Maximum amount of concurrent calls. Default: the connection pool size
+        :param ordered: Yield results in the order of calls instead of completion order
+
+        :return: Generator of FanOutResult, an async generator on AsyncTwitch
+        """
+        fan_out = self._create_fan_out(max_workers)
+
+        for method, kwargs in calls:
+            fan_out.submit(method, **kwargs)
+
+        return fan_out.run(ordered)
+
+    def _create_fan_out(self, max_workers):
+        return FanOut(self, max_workers)
+
+    def _fetch(self, endpoint, query, wrap, method='GET'):
+        """
+        Request an endpoint and pass the decoded response data to wrap
+
+        :param endpoint: Endpoint which to request
+        :param query: Dictionary of query elements
+        :param wrap: Function turning the decoded data into the result
+        :param method: The method to use
+
+        :return: Result of wrap
+        """
+        ttl = self.cache_ttl.get(endpoint)
+
+        if self.cache is None or ttl is None or method != 'GET':
+            return self._then(self._request_data(endpoint, query, method), wrap)
+
+        key = endpoint + '?' + urllib.parse.urlencode(sorted((k, sorted(v) if isinstance(v, list) else v) for k, v in query.items()), doseq=True)
+        data = self.cache.get(key)
+
+        if data is not None:
+            return self._resolved(wrap(data))
+
+        def store(data):
+            self.cache.set(key, data, ttl)
+            return wrap(data)
+
+        return self._then(self._request_data(endpoint, query, method), store)
+
+    def _fetch_ids(self, endpoint, query, mapping, fields):
+        """
+        Request an ID lookup endpoint, caching every returned object on its own.
+        Only the values which are not cached are requested.
+
+        :param endpoint: Endpoint which to request
+        :param query: Dictionary of query elements, holding lists of values
+        :param mapping: Model class
+        :param fields: Query elements which are also fields of the returned objects
+
+        :return: Array of mapping objects
+        """
+        ttl = self.cache_ttl.get(endpoint)
+
+        if self.cache is None or ttl is None:
+            return self._then(self._request_data(endpoint, query, 'GET'), lambda data: self.process_array(data['data'], mapping))
+
+        rows = []
+        missing = {}
+
+        for field in fields:
+            for value in query.get(field, []):
+                row = self.cache.get(self.__id_key(endpoint, field, value))
+
+                if row is None:
+                    missing.setdefault(field, []).append(value)
+                elif row not in rows:
+                    rows.append(row)
+
+        if len(missing) == 0:
+            return self._resolved(self.process_array(rows, mapping))
+
+        def store(data):
+            for row in data['data']:
+                for field in fields:
+                    self.cache.set(self.__id_key(endpoint, field, row[field]), row, ttl)
+
+            return self.process_array(rows + data['data'], mapping)
+
+        return self._then(self._request_data(endpoint, missing, 'GET'), store)
+
+    @staticmethod
+    def __id_key(endpoint, field, value):
+        return '{}#{}={}'.format(endpoint, field, value)
+
+    def _invalidate_ids(self, endpoint, row, fields):
+        """
+        Drop the cached copies of an object changed by a write, which _fetch_ids cached per field
 
-        connection.request(method, self.api_base + endpoint, body, headers)
+        :param endpoint: Lookup endpoint the object is cached under
+        :param row: Decoded object returned by the write
+        :param fields: Fields the object is cached by
+        """
+        if self.cache is None:
+            return
+
+        for field in fields:
+            if row.get(field) is not None:
+                self.cache.delete(self.__id_key(endpoint, field, row[field]))
+
+    def _request_data(self, endpoint, query, method):
+        """
+        :return: Decoded response data
+        """
+        return self._decode(self.do_request(endpoint, method=method, query=query))
+
+    def _decode(self, response):
+        data = self.decoder(response.read())
+
+        if response.status < 200 or response.status > 299:
+            raise Exception(data['message'])
+
+        return data
 
-        return connection.getresponse()
+    def _then(self, result, callback):
+        """
+        Apply callback to the result of an endpoint method
+        """
+        return callback(result)
+
+    def _resolved(self, value):
+        """
+        Wrap a value so it is returned like the result of an endpoint method
+        """
+        return value
 
     def __get_array(self, data):
         if not isinstance(data, list):
@@ -66,13 +365,103 @@ class Twitch:
         return data
 
     def process_array(self, data, mapping):
-        result = []
+        from_json = mapping.from_json
+        result = [from_json(i, self) for i in data]
 
-        for i in data:
-            result.append(mapping.from_json(i, self))
+        if self._batch is not None:
+            self._batch.collect(result)
 
         return result
 
+    def _lookup(self, method, ids):
+        """
+        Look up IDs in requests of at most 100 IDs
+
+        :param method: get_users or get_games
+        :param ids: List of IDs
+
+        :return: Dictionary of ID to object
+        """
+        found = {}
+
+        for start in range(0, len(ids), 100):
+            for item in method(id=ids[start:start + 100]):
+                found[item.id] = item
+
+        return found
+
+    @property
+    def _batch(self):
+        return self._batch_scope.get()
+
+    def _create_batch(self):
+        return LookupBatch(self)
+
+    @contextmanager
+    def batch_lookups(self):
+        """
+        Coalesce user and game lookups of the models created within the block.
+        For example, Stream.get_user() on every stream of a page results in a single request.
+
+        The batch only applies to the calling thread or asyncio task, and to tasks it creates within the block.
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+
+        token = self._batch_scope.set(self._create_batch())
+
+        try:
+            yield self._batch
+        finally:
+            self._batch_scope.reset(token)
+
+    def load_users(self, ids):
+        """
+        Look up users by ID, coalesced with other lookups inside batch_lookups()
+
+        :param ids: List of user IDs
+
+        :return: Dictionary of user ID to User
+        """
+        if self._batch is not None:
+            return self._batch.load('users', ids)
+
+        return self._lookup(self.get_users, list(dict.fromkeys(ids)))
+
+    def load_games(self, ids):
+        """
+        Look up games by ID, coalesced with other lookups inside batch_lookups()
+
+        :param ids: List of game IDs
+
+        :return: Dictionary of game ID to Game
+        """
+        if self._batch is not None:
+            return self._batch.load('games', ids)
+
+        return self._lookup(self.get_games, list(dict.fromkeys(ids)))
+
+    def resolve_users(self, objects):
+        """
+        Look up every user referenced by objects (user_id, from_id and to_id) in bulk
+
+        :param objects: Iterable of Stream, StreamMetadata, Video or Follow objects
+
+        :return: Dictionary of user ID to User
+        """
+        return self.load_users(collect_ids(objects, REFERENCES['users']))
+
+    def resolve_games(self, objects):
+        """
+        Look up every game referenced by objects (game_id) in bulk
+
+        :param objects: Iterable of Stream or StreamMetadata objects
+
+        :return: Dictionary of game ID to Game
+        """
+        return self.load_games(collect_ids(objects, REFERENCES['games']))
+
     def upload_entitlement(self):
         pass  # TODO
 
@@ -99,15 +488,7 @@ class Twitch:
         if name is not None:
             query['name'] = self.__get_array(name)
 
-        response = self.do_request('/games', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
-
-        return self.process_array(data['data'], Game)
+        return self._fetch_ids('/games', query, Game, ('id', 'name'))
 
     def get_streams(self, user_id=None, user_name=None, amount=20, stream_type='all', language=None, game_id=None, community_id=None):
         """
@@ -152,15 +533,7 @@ class Twitch:
         if community_id is not None:
             query['language'] = self.__get_array(community_id)
 
-        response = self.do_request('/streams', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
-
-        return PaginatedResponse(data, '/streams', query, Stream, self)
+        return self._fetch('/streams', query, lambda data: PaginatedResponse(data, '/streams', query, Stream, self))
 
     def get_streams_metadata(self, user_id=None, user_name=None, amount=20, stream_type='all', language=None, game_id=None, community_id=None):
         """
@@ -205,15 +578,7 @@ class Twitch:
         if community_id is not None:
             query['language'] = self.__get_array(community_id)
 
-        response = self.do_request('/streams/metadata', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
-
-        return PaginatedResponse(data, '/streams/metadata', query, StreamMetadata, self)
+        return self._fetch('/streams/metadata', query, lambda data: PaginatedResponse(data, '/streams/metadata', query, StreamMetadata, self))
 
     def get_users(self, id=None, login=None):
         """
@@ -241,15 +606,7 @@ class Twitch:
         if login is not None:
             query['login'] = self.__get_array(login)
 
-        response = self.do_request('/users', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
-
-        return self.process_array(data['data'], User)
+        return self._fetch_ids('/users', query, User, ('id', 'login'))
 
     def get_users_follows(self, from_id=None, to_id=None, amount=20):
         """
@@ -279,15 +636,7 @@ class Twitch:
 
         query['amount'] = amount
 
-        response = self.do_request('/users/follows', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
-
-        return PaginatedResponse(data, '/users/follows', query, Follow, self)
+        return self._fetch('/users/follows', query, lambda data: PaginatedResponse(data, '/users/follows', query, Follow, self))
 
     def update_user(self, description):
         """
@@ -299,15 +648,11 @@ class Twitch:
         """
         query = {'description': description}
 
-        response = self.do_request('/users', method='PUT', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
+        def updated(data):
+            self._invalidate_ids('/users', data['data'][0], ('id', 'login'))
+            return User.from_json(data['data'][0], self)
 
-        return User.from_json(data['data'][0], self)
+        return self._fetch('/users', query, updated, method='PUT')
 
     def get_videos(self, id=None, user_id=None, game_id=None, amount=20, language=None, period='all', sort='time', video_type='all'):
         """
@@ -361,12 +706,4 @@ class Twitch:
         if video_type is not None:
             query['type'] = video_type
 
-        response = self.do_request('/videos', query=query)
-
-        data = response.read()
-        data = json.loads(data)
-
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
-
-        return PaginatedResponse(data, '/videos', query, Video, self)
+        return self._fetch('/videos', query, lambda data: PaginatedResponse(data, '/videos', query, Video, self))
@@ -1 +1,12 @@
 from .pagination import PaginatedResponse
+from .connectionpool import ConnectionPool, BufferedResponse
+from .asyncconnectionpool import AsyncConnectionPool
+from .batching import LookupBatch, AsyncLookupBatch
+from .cache import MemoryCache, SqliteCache
+from .ratelimit import RateLimiter
+from .columnar import StreamColumns, VideoColumns, FollowColumns
+from .fanout import FanOut, AsyncFanOut, FanOutResult
+from .decoder import default_decoder
+from .transport import RecordingTransport, ReplayTransport, AsyncRecordingTransport, AsyncReplayTransport
+from .metrics import Metrics, Histogram, PrometheusExporter, StatsdExporter
+from .log import BackgroundLogHandler, enable_logging
@@ -0,0 +1,195 @@
+from pytwitchinteract.utils.connectionpool import BufferedResponse, decompress
+
+import asyncio
+import http.client
+import io
+import ssl
+
+
+# Errors raised when a kept-alive connection was closed by the remote end while idle
+STALE_ERRORS = (
+    asyncio.IncompleteReadError,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError
+)
+
+
+class AsyncConnectionPool:
+
+    def __init__(self, host, secure=True, size=10, timeout=10):
+        """
+        Bounded pool of non-blocking keep-alive connections to a single host
+
+        :param host: Host (optionally with a port) to connect to
+        :param secure: Whether to use HTTPS
+        :param size: Maximum number of connections open at the same time
+        :param timeout: Timeout in seconds
+        """
+        self.host = host
+        self.secure = secure
+        self.size = size
+        self.timeout = timeout
+
+        self.handshakes = 0
+        self.reuses = 0
+        self.stale = 0
+
+        if ':' in host:
+            self.hostname, port = host.rsplit(':', 1)
+            self.port = int(port)
+        else:
+            self.hostname = host
+            self.port = 443 if secure else 80
+
+        self.__idle = []
+        self.__slots = asyncio.Semaphore(size)
+        self.__ssl = ssl.create_default_context() if secure else None
+
+    async def __new_connection(self):
+        connection = await asyncio.wait_for(asyncio.open_connection(self.hostname, self.port, ssl=self.__ssl), self.timeout)
+        self.handshakes += 1
+        return connection
+
+    async def __get_connection(self):
+        while self.__idle:
+            reader, writer = self.__idle.pop()
+
+            if reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+
+            self.reuses += 1
+            return (reader, writer), True
+
+        return await self.__new_connection(), False
+
+    async def request(self, method, url, body=None, headers=None):
+        """
+        Perform a request over a pooled connection.
+        Waits while all connections are in use.
+
+        :param method: The method to use
+        :param url: Path (and query) to request
+        :param body: Body string
+        :param headers: Dictionary of headers
+
+        :return: BufferedResponse
+        """
+        if headers is None:
+            headers = {}
+
+        async with self.__slots:
+            connection, reused = await self.__get_connection()
+
+            try:
+                response, will_close = await asyncio.wait_for(self.__send(connection, method, url, body, headers), self.timeout)
+            except STALE_ERRORS:
+                connection[1].close()
+
+                if not reused:
+                    raise
+
+                # The idle connection went away under us, retry once on a fresh one
+                self.stale += 1
+
+                connection = await self.__new_connection()
+                response, will_close = await asyncio.wait_for(self.__send(connection, method, url, body, headers), self.timeout)
+
+            if will_close:
+                connection[1].close()
+            else:
+                self.__idle.append(connection)
+
+            return response
+
+    async def __send(self, connection, method, url, body, headers):
+        reader, writer = connection
+
+        try:
+            writer.write(self.__encode_request(method, url, body, headers))
+            await writer.drain()
+
+            return await self.__read_response(reader, method)
+        except BaseException:
+            writer.close()
+            raise
+
+    def __encode_request(self, method, url, body, headers):
+        if isinstance(body, str):
+            body = body.encode('UTF-8')
+
+        lines = ['{} {} HTTP/1.1'.format(method, url), 'Host: {}'.format(self.host)]
+
+        for name, value in headers.items():
+            lines.append('{}: {}'.format(name, value))
+
+        if body is not None:
+            lines.append('Content-Length: {}'.format(len(body)))
+
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('UTF-8')
+
+        if body is not None:
+            request += body
+
+        return request
+
+    async def __read_response(self, reader, method):
+        head = await reader.readuntil(b'\r\n\r\n')
+        status_line, _, header_block = head.partition(b'\r\n')
+
+        _, status, reason = (status_line.decode('iso-8859-1').split(' ', 2) + [''])[:3]
+        status = int(status)
+        headers = http.client.parse_headers(io.BytesIO(header_block))
+
+        will_close = headers.get('Connection', '').lower() == 'close'
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            chunks = []
+        elif 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            chunks = await self.__read_chunked(reader)
+        elif headers.get('Content-Length') is not None:
+            chunks = [await reader.readexactly(int(headers['Content-Length']))]
+        else:
+            chunks = [await reader.read()]
+            will_close = True
+
+        body, wire_size = decompress(chunks, headers.get('Content-Encoding'))
+
+        return BufferedResponse(status, reason.strip(), headers, body, wire_size), will_close
+
+    async def __read_chunked(self, reader):
+        chunks = []
+
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+
+            if size == 0:
+                # Skip trailers
+                while (await reader.readuntil(b'\r\n')) != b'\r\n':
+                    pass
+                break
+
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+        return chunks
+
+    def close(self):
+        """
+        Close all idle connections
+        """
+        while self.__idle:
+            self.__idle.pop()[1].close()
+
+    def stats(self):
+        """
+        :return: Dictionary of pool counters
+        """
+        return {
+            'size': self.size,
+            'idle': len(self.__idle),
+            'handshakes': self.handshakes,
+            'reuses': self.reuses,
+            'stale': self.stale
+        }
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+
+# Model attributes referencing other objects, by the kind of object they reference
+REFERENCES = {
+    'users': ('user_id', 'from_id', 'to_id'),
+    'games': ('game_id',)
+}
+
+
+def collect_ids(objects, attributes):
+    """
+    :param objects: Model objects
+    :param attributes: Attributes holding the IDs
+
+    :return: List of unique, non-empty IDs in order of appearance
+    """
+    ids = {}
+
+    for obj in objects:
+        for attribute in attributes:
+            value = getattr(obj, attribute, None)
+
+            if value is not None and value != "":
+                ids[value] = None
+
+    return list(ids)
+
+
+class LookupBatch:
+
+    def __init__(self, twitch):
+        """
+        Coalesces user and game lookups made while the batch is active.
+        IDs referenced by every model created within the batch are queued,
+        and the first lookup fetches all of them in requests of up to 100 IDs.
+
+        :param twitch: Twitch API instance
+        """
+        self.twitch = twitch
+
+        self._loaders = {
+            'users': twitch.get_users,
+            'games': twitch.get_games
+        }
+        self._in_flight = {kind: {} for kind in REFERENCES}
+        self.__pending = {kind: {} for kind in REFERENCES}
+        self.__results = {kind: {} for kind in REFERENCES}
+        self.__lock = threading.Lock()
+
+    def collect(self, objects):
+        """
+        Queue the IDs referenced by objects for the next lookup
+
+        :param objects: Model objects
+        """
+        for kind, attributes in REFERENCES.items():
+            self._queue(kind, collect_ids(objects, attributes))
+
+    def _queue(self, kind, ids):
+        with self.__lock:
+            results = self.__results[kind]
+            pending = self.__pending[kind]
+            in_flight = self._in_flight[kind]
+
+            for value in ids:
+                if value not in results and value not in in_flight:
+                    pending[value] = None
+
+    def _take(self, kind):
+        """
+        :return: List of the queued IDs, which are no longer queued afterwards
+        """
+        with self.__lock:
+            batch = list(self.__pending[kind])
+            self.__pending[kind].clear()
+
+        return batch
+
+    def load(self, kind, ids):
+        """
+        :param kind: "users" or "games"
+        :param ids: IDs to look up
+
+        :return: Dictionary of ID to object, for the IDs which exist
+        """
+        self._queue(kind, ids)
+        batch = self._take(kind)
+
+        if len(batch) == 0:
+            return self.twitch._resolved(self._select(kind, ids))
+
+        return self.twitch._then(self.twitch._lookup(self._loaders[kind], batch), lambda found: self._store(kind, batch, found, ids))
+
+    def _store(self, kind, batch, found, ids):
+        with self.__lock:
+            results = self.__results[kind]
+
+            # Remember IDs which don't exist, so they are not requested again
+            for value in batch:
+                results[value] = found.get(value)
+
+        return self._select(kind, ids)
+
+    def _select(self, kind, ids):
+        results = self.__results[kind]
+        return {value: results[value] for value in ids if results.get(value) is not None}
+
+
+class AsyncLookupBatch(LookupBatch):
+
+    def __init__(self, twitch):
+        """
+        LookupBatch of AsyncTwitch. Lookups started in the same iteration of the event loop,
+        e.g. the calls passed to asyncio.gather(), share one request, and lookups of IDs
+        which are already being requested wait for that request instead of making another.
+
+        :param twitch: AsyncTwitch API instance
+        """
+        LookupBatch.__init__(self, twitch)
+
+    def load(self, kind, ids):
+        self._queue(kind, ids)
+        return self.__load(kind, ids)
+
+    async def __load(self, kind, ids):
+        # Let the other lookups of this event loop iteration queue their IDs first
+        await asyncio.sleep(0)
+
+        in_flight = self._in_flight[kind]
+        batch = self._take(kind)
+
+        if len(batch) > 0:
+            request = asyncio.ensure_future(self.__request(kind, batch))
+
+            for value in batch:
+                in_flight[value] = request
+
+        requests = {in_flight[value] for value in ids if value in in_flight}
+
+        if len(requests) > 0:
+            await asyncio.gather(*requests)
+
+        return self._select(kind, ids)
+
+    async def __request(self, kind, batch):
+        try:
+            self._store(kind, batch, await self.twitch._lookup(self._loaders[kind], batch), ())
+        finally:
+            in_flight = self._in_flight[kind]
+
+            for value in batch:
+                in_flight.pop(value, None)
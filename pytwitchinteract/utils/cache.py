@@ -0,0 +1,204 @@
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+
+# Share of SqliteCache.max_size evicted at once, so the rows only have to be counted once per that many inserts
+EVICTION_BATCH = 0.05
+
+
+class MemoryCache:
+
+    def __init__(self, max_size=10000):
+        """
+        In-memory LRU cache with per-entry expiry
+
+        :param max_size: Maximum amount of entries, least recently used entries are evicted first
+        """
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: Cache key
+
+        :return: Cached value or None
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires = entry
+
+            if expires < time.monotonic():
+                del self.__entries[key]
+                self.misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        :param key: Cache key
+        :param value: Value to cache
+        :param ttl: Time to live in seconds
+        """
+        with self.__lock:
+            self.__entries[key] = (value, time.monotonic() + ttl)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def stats(self):
+        """
+        :return: Dictionary of cache counters
+        """
+        return {
+            'size': len(self.__entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class SqliteCache:
+
+    def __init__(self, path, max_size=100000):
+        """
+        On-disk LRU cache with per-entry expiry, which can be shared between processes.
+        Values have to be JSON serializable.
+
+        :param path: Path of the sqlite database
+        :param max_size: Maximum amount of entries, least recently used entries are evicted first,
+            in batches of EVICTION_BATCH * max_size entries
+        """
+        self.path = path
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache (used)")
+
+        # Running row count, recounted before evicting as other processes may share the database
+        self.__size = self.__count()
+
+    def get(self, key):
+        """
+        :param key: Cache key
+
+        :return: Cached value or None
+        """
+        now = time.time()
+
+        with self.__lock:
+            row = self.__connection.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    self.__size -= self.__connection.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+
+                self.misses += 1
+                return None
+
+            self.__connection.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        """
+        :param key: Cache key
+        :param value: JSON serializable value to cache
+        :param ttl: Time to live in seconds
+        """
+        now = time.time()
+
+        with self.__lock:
+            exists = self.__connection.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone() is not None
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+
+            if not exists:
+                self.__size += 1
+
+            if self.__size > self.max_size:
+                self.__evict()
+
+    def __evict(self):
+        self.__size = self.__count()
+        overflow = self.__size - self.max_size
+
+        if overflow > 0:
+            overflow += int(self.max_size * EVICTION_BATCH)
+            evicted = self.__connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used LIMIT ?)", (overflow,)
+            ).rowcount
+            self.__size -= evicted
+            self.evictions += evicted
+
+    def __count(self):
+        return self.__connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def delete(self, key):
+        with self.__lock:
+            self.__size -= self.__connection.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+
+    def clear(self):
+        with self.__lock:
+            self.__connection.execute("DELETE FROM cache")
+            self.__size = 0
+
+    def close(self):
+        self.__connection.close()
+
+    def __len__(self):
+        with self.__lock:
+            return self.__count()
+
+    def stats(self):
+        """
+        :return: Dictionary of cache counters
+        """
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,229 @@
+from pytwitchinteract.models import Stream, Video, Follow
+
+from array import array
+from collections import Counter
+import heapq
+import sys
+
+
+class StringColumn:
+
+    def __init__(self):
+        """
+        Dictionary encoded column of interned strings
+        """
+        self.codes = array('l')
+        self.values = []
+        self.__lookup = {}
+
+    def append(self, value):
+        code = self.__lookup.get(value)
+
+        if code is None:
+            code = len(self.values)
+            value = sys.intern(value)
+            self.values.append(value)
+            self.__lookup[value] = code
+
+        self.codes.append(code)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+
+class Columns:
+
+    # Field name to column type, "int" or "str"
+    SCHEMA = {}
+
+    def __init__(self):
+        """
+        Typed columns accumulated straight from Helix response rows, without creating model objects
+        """
+        self.length = 0
+        self.columns = {}
+
+        for field, kind in self.SCHEMA.items():
+            self.columns[field] = array('q') if kind == 'int' else StringColumn()
+
+    def extend(self, rows):
+        """
+        :param rows: Decoded response rows
+        """
+        integers = [(field, self.columns[field].append) for field, kind in self.SCHEMA.items() if kind == 'int']
+        strings = [(field, self.columns[field].append) for field, kind in self.SCHEMA.items() if kind == 'str']
+
+        for row in rows:
+            for field, append in integers:
+                value = row[field]
+                append(int(value) if value else 0)
+
+            for field, append in strings:
+                value = row[field]
+                append(value if value is not None else "")
+
+        self.length += len(rows)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def row(self, index):
+        """
+        :return: Dictionary of a single row
+        """
+        return {field: column[index] for field, column in self.columns.items()}
+
+    def group_sum(self, key, value):
+        """
+        :param key: Column to group by
+        :param value: Integer column to sum
+
+        :return: Dictionary of key to sum
+        """
+        keys = self.columns[key]
+        values = self.columns[value]
+        sums = {}
+
+        if isinstance(keys, StringColumn):
+            totals = [0] * len(keys.values)
+
+            for code, amount in zip(keys.codes, values):
+                totals[code] += amount
+
+            return dict(zip(keys.values, totals))
+
+        for group, amount in zip(keys, values):
+            sums[group] = sums.get(group, 0) + amount
+
+        return sums
+
+    def histogram(self, field):
+        """
+        :param field: Column to count the values of
+
+        :return: Dictionary of value to amount of rows
+        """
+        column = self.columns[field]
+
+        if isinstance(column, StringColumn):
+            return {column.values[code]: amount for code, amount in Counter(column.codes).items()}
+
+        return dict(Counter(column))
+
+    def top(self, n, field):
+        """
+        :param n: Amount of rows
+        :param field: Integer column to sort by, descending
+
+        :return: List of row dictionaries
+        """
+        column = self.columns[field]
+        return [self.row(index) for index in heapq.nlargest(n, range(self.length), key=column.__getitem__)]
+
+    def to_numpy(self):
+        """
+        Requires numpy. String columns are returned as (codes, values) tuples.
+
+        :return: Dictionary of field to numpy array
+        """
+        import numpy
+
+        result = {}
+
+        for field, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                result[field] = (numpy.frombuffer(column.codes, dtype=numpy.dtype(column.codes.typecode)), column.values)
+            else:
+                result[field] = numpy.frombuffer(column, dtype=numpy.int64)
+
+        return result
+
+
+class StreamColumns(Columns):
+
+    SCHEMA = {
+        'id': 'int',
+        'user_id': 'int',
+        'game_id': 'int',
+        'viewer_count': 'int',
+        'type': 'str',
+        'title': 'str',
+        'language': 'str',
+        'started_at': 'str'
+    }
+
+    def viewers_by_game(self):
+        """
+        :return: Dictionary of game ID to total viewers
+        """
+        return self.group_sum('game_id', 'viewer_count')
+
+    def top_streams(self, n=10):
+        """
+        :return: List of the n most watched streams as row dictionaries
+        """
+        return self.top(n, 'viewer_count')
+
+    def languages(self):
+        """
+        :return: Dictionary of language to amount of streams
+        """
+        return self.histogram('language')
+
+
+class VideoColumns(Columns):
+
+    SCHEMA = {
+        'id': 'int',
+        'user_id': 'int',
+        'view_count': 'int',
+        'title': 'str',
+        'language': 'str',
+        'created_at': 'str',
+        'published_at': 'str'
+    }
+
+    def views_by_user(self):
+        """
+        :return: Dictionary of user ID to total views
+        """
+        return self.group_sum('user_id', 'view_count')
+
+    def languages(self):
+        """
+        :return: Dictionary of language to amount of videos
+        """
+        return self.histogram('language')
+
+
+class FollowColumns(Columns):
+
+    SCHEMA = {
+        'from_id': 'int',
+        'to_id': 'int',
+        'followed_at': 'str'
+    }
+
+    def followers(self):
+        """
+        :return: Dictionary of followed user ID to amount of followers
+        """
+        return self.histogram('to_id')
+
+
+# Columnar representation of every model which can be paginated
+COLUMNS = {
+    Stream: StreamColumns,
+    Video: VideoColumns,
+    Follow: FollowColumns
+}
@@ -0,0 +1,205 @@
+import http.client
+import queue
+import threading
+import zlib
+
+
+# Errors raised when a kept-alive connection was closed by the remote end while idle
+STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError
+)
+
+
+def decompress(chunks, encoding):
+    """
+    Decompress a gzip or deflate encoded body chunk by chunk
+
+    :param chunks: Iterable of body chunks as received
+    :param encoding: Value of the Content-Encoding header
+
+    :return: Tuple of the decoded body and the amount of bytes received
+    """
+    encoding = (encoding or '').strip().lower()
+    wire_size = 0
+
+    if encoding not in ('gzip', 'x-gzip', 'deflate'):
+        body = b''.join(chunks)
+        return body, len(body)
+
+    # Detects both zlib and gzip headers, deflate without a zlib header is handled below
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    decoded = []
+
+    for chunk in chunks:
+        if wire_size == 0 and encoding == 'deflate':
+            try:
+                decoded.append(decompressor.decompress(chunk))
+            except zlib.error:
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                decoded.append(decompressor.decompress(chunk))
+        else:
+            decoded.append(decompressor.decompress(chunk))
+
+        wire_size += len(chunk)
+
+    decoded.append(decompressor.flush())
+
+    return b''.join(decoded), wire_size
+
+
+class BufferedResponse:
+
+    def __init__(self, status, reason, headers, body, wire_size=None):
+        """
+        :param status: HTTP status code
+        :param reason: HTTP reason phrase
+        :param headers: Response headers
+        :param body: Fully read and decoded response body
+        :param wire_size: Amount of body bytes received, before decompression
+        """
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.wire_size = wire_size if wire_size is not None else len(body)
+
+    def read(self):
+        return self.body
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+
+class ConnectionPool:
+
+    def __init__(self, host, secure=True, size=10, timeout=10):
+        """
+        Bounded pool of keep-alive connections to a single host
+
+        :param host: Host (optionally with a port) to connect to
+        :param secure: Whether to use HTTPS
+        :param size: Maximum number of connections open at the same time
+        :param timeout: Socket timeout in seconds
+        """
+        self.host = host
+        self.secure = secure
+        self.size = size
+        self.timeout = timeout
+
+        self.handshakes = 0
+        self.reuses = 0
+        self.stale = 0
+
+        self.__idle = queue.LifoQueue()
+        self.__slots = threading.BoundedSemaphore(size)
+        self.__lock = threading.Lock()
+
+    def __new_connection(self):
+        if self.secure:
+            connection = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        else:
+            connection = http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+        with self.__lock:
+            self.handshakes += 1
+
+        return connection
+
+    def __get_connection(self):
+        try:
+            connection = self.__idle.get_nowait()
+        except queue.Empty:
+            return self.__new_connection(), False
+
+        with self.__lock:
+            self.reuses += 1
+
+        return connection, True
+
+    def request(self, method, url, body=None, headers=None):
+        """
+        Perform a request over a pooled connection.
+        Blocks while all connections are in use.
+
+        :param method: The method to use
+        :param url: Path (and query) to request
+        :param body: Body string
+        :param headers: Dictionary of headers
+
+        :return: BufferedResponse
+        """
+        if headers is None:
+            headers = {}
+
+        self.__slots.acquire()
+
+        try:
+            connection, reused = self.__get_connection()
+
+            try:
+                response = self.__send(connection, method, url, body, headers)
+            except STALE_ERRORS:
+                connection.close()
+
+                if not reused:
+                    raise
+
+                # The idle connection went away under us, retry once on a fresh one
+                with self.__lock:
+                    self.stale += 1
+
+                connection = self.__new_connection()
+                response = self.__send(connection, method, url, body, headers)
+
+            if response.will_close:
+                connection.close()
+            else:
+                self.__idle.put(connection)
+
+            return BufferedResponse(response.status, response.reason, response.headers, response.data, response.wire_size)
+        finally:
+            self.__slots.release()
+
+    def __send(self, connection, method, url, body, headers):
+        try:
+            connection.request(method, url, body, headers)
+            response = connection.getresponse()
+
+            # The body has to be drained before the connection can be used again
+            chunks = iter(lambda: response.read(65536), b'')
+            response.data, response.wire_size = decompress(chunks, response.getheader('Content-Encoding'))
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+
+        return response
+
+    def close(self):
+        """
+        Close all idle connections
+        """
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        """
+        :return: Dictionary of pool counters
+        """
+        return {
+            'size': self.size,
+            'idle': self.__idle.qsize(),
+            'handshakes': self.handshakes,
+            'reuses': self.reuses,
+            'stale': self.stale
+        }
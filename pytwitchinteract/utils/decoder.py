@@ -0,0 +1,20 @@
+import json
+
+
+def default_decoder():
+    """
+    :return: The fastest installed JSON decoder, orjson or ujson, falling back to json
+    """
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        pass
+
+    try:
+        import ujson
+        return ujson.loads
+    except ImportError:
+        pass
+
+    return json.loads
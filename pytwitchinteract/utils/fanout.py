@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import inspect
+
+
+class FanOutResult:
+
+    def __init__(self, index, method, args, kwargs, result=None, exception=None):
+        """
+        :param index: Position of the call in submission order
+        :param method: Name of the called method
+        :param args: Positional arguments of the call
+        :param kwargs: Keyword arguments of the call
+        :param result: Return value of the call
+        :param exception: Exception raised by the call, if any
+        """
+        self.index = index
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.result = result
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+
+class FanOut:
+
+    def __init__(self, twitch, max_workers=None):
+        """
+        Runs many Twitch method calls concurrently over the shared connection pool and rate limiter
+
+        :param twitch: Twitch API instance
+        :param max_workers: Maximum amount of concurrent calls. Default: the connection pool size
+        """
+        self.twitch = twitch
+        self.max_workers = max_workers if max_workers is not None else twitch.pool.size
+        self.calls = []
+
+    def submit(self, method, *args, **kwargs):
+        """
+        :param method: Name of a Twitch method, for example "get_streams"
+        :param args: Positional arguments
+        :param kwargs: Keyword arguments
+
+        :return: Index of the call
+        """
+        self.calls.append((method, args, kwargs))
+        return len(self.calls) - 1
+
+    def __call(self, index):
+        method, args, kwargs = self.calls[index]
+
+        try:
+            return FanOutResult(index, method, args, kwargs, result=getattr(self.twitch, method)(*args, **kwargs))
+        except Exception as e:
+            return FanOutResult(index, method, args, kwargs, exception=e)
+
+    def run(self, ordered=False):
+        """
+        Run all submitted calls. Exceptions are captured per call instead of aborting the batch.
+
+        :param ordered: Return results in submission order instead of completion order
+
+        :return: Generator of FanOutResult
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.__call, index) for index in range(len(self.calls))]
+
+            try:
+                for future in (futures if ordered else as_completed(futures)):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+class AsyncFanOut(FanOut):
+    """
+    FanOut of AsyncTwitch, running the calls as tasks on the event loop instead of on threads.
+    run() returns an async generator.
+    """
+
+    async def __call(self, index, semaphore):
+        method, args, kwargs = self.calls[index]
+
+        async with semaphore:
+            try:
+                result = getattr(self.twitch, method)(*args, **kwargs)
+
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                return FanOutResult(index, method, args, kwargs, exception=e)
+
+        return FanOutResult(index, method, args, kwargs, result=result)
+
+    async def run(self, ordered=False):
+        """
+        Run all submitted calls. Exceptions are captured per call instead of aborting the batch.
+
+        :param ordered: Return results in submission order instead of completion order
+
+        :return: Async generator of FanOutResult
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+        tasks = [asyncio.ensure_future(self.__call(index, semaphore)) for index in range(len(self.calls))]
+
+        try:
+            for task in (tasks if ordered else asyncio.as_completed(tasks)):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
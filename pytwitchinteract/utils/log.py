@@ -0,0 +1,162 @@
+from collections import deque
+import atexit
+import logging
+import os
+import sys
+import threading
+
+
+LOGGER = 'pytwitchinteract'
+
+DEFAULT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+class BackgroundLogHandler(logging.Handler):
+
+    def __init__(self, stream=None, queue_size=10000, batch_size=256, flush_interval=0.5):
+        """
+        Handler writing records from a background thread, so logging never blocks the caller on I/O.
+
+        emit() only appends the record to a bounded queue. The thread formats the records and writes them
+        in batches with a single write and flush. Records arriving while the queue is full are dropped and counted.
+
+        :param stream: Stream to write to, defaults to sys.stderr
+        :param queue_size: Maximum amount of records waiting to be written
+        :param batch_size: Maximum amount of records written at once
+        :param flush_interval: Maximum seconds a record waits before being written
+        """
+        logging.Handler.__init__(self)
+        self.stream = stream
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+
+        self.__closed = False
+        self.__reset()
+
+        # Threads do not survive a fork, a forked process (TwitchChat.listen(async_=True)) writes from its own thread
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.__reset)
+
+    def __reset(self):
+        self.__queue = deque()
+        self.__condition = threading.Condition(threading.Lock())
+        self.__thread = None
+
+    def emit(self, record):
+        with self.__condition:
+            if self.__closed:
+                return
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__write, daemon=True)
+                self.__thread.start()
+
+            if len(self.__queue) >= self.queue_size:
+                self.dropped += 1
+                return
+
+            self.__queue.append(record)
+            self.queued += 1
+
+            if len(self.__queue) >= self.batch_size:
+                self.__condition.notify()
+
+    def __next_batch(self):
+        with self.__condition:
+            while not self.__queue and not self.__closed:
+                self.__condition.wait()
+
+            if len(self.__queue) < self.batch_size and not self.__closed:
+                self.__condition.wait(self.flush_interval)
+
+            return [self.__queue.popleft() for _ in range(min(len(self.__queue), self.batch_size))]
+
+    def __write(self):
+        while True:
+            batch = self.__next_batch()
+
+            if not batch:
+                return
+
+            lines = []
+
+            for record in batch:
+                try:
+                    lines.append(self.format(record))
+                except Exception:
+                    self.handleError(record)
+
+            stream = self.stream or sys.stderr
+
+            try:
+                stream.write('\n'.join(lines) + '\n')
+                stream.flush()
+            except Exception:
+                # Logging must not take down the writer thread
+                pass
+
+            self.written += len(batch)
+
+    def flush(self):
+        """
+        Wait until the records queued so far are written
+        """
+        with self.__condition:
+            thread = self.__thread
+            queued = self.queued
+            self.__condition.notify()
+
+        while thread is not None and self.written < queued and thread.is_alive():
+            thread.join(0.01)
+
+    def close(self):
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+
+        if self.__thread is not None:
+            self.__thread.join()
+
+        logging.Handler.close(self)
+
+
+def enable_logging(level=logging.INFO, stream=None, fmt=DEFAULT_FORMAT, **options):
+    """
+    Log the events of this package through a BackgroundLogHandler.
+    Prefer configuring the "pytwitchinteract" logger yourself when your application already sets up logging.
+
+    :param level: Minimum level logged, DEBUG includes every received chat line
+    :param stream: Stream to write to, defaults to sys.stderr
+    :param fmt: Format of the records
+    :param options: Passed to BackgroundLogHandler
+    :return: The handler, already attached
+    """
+    handler = BackgroundLogHandler(stream, **options)
+    handler.setFormatter(logging.Formatter(fmt))
+
+    logger = logging.getLogger(LOGGER)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+
+    # Write what is still queued when the interpreter exits
+    atexit.register(handler.close)
+
+    return handler
+
+
+def configure_logging(verbose, debug):
+    """
+    Enable logging for the verbose and debug flags of the chats, unless the application configured logging already
+
+    :return: Whether logging was enabled
+    """
+    if not (verbose or debug) or logging.getLogger(LOGGER).handlers or logging.getLogger().handlers:
+        return False
+
+    enable_logging(logging.DEBUG if debug else logging.INFO)
+    return True
@@ -0,0 +1,266 @@
+from bisect import bisect_left
+import socket
+import threading
+import time
+
+
+# Upper bounds of the histogram buckets of durations in seconds
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Upper bounds of the histogram buckets of sizes in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        """
+        :param buckets: Sorted upper bounds of the buckets, values above the last bound are only counted in the total
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        :return: List of (upper bound, observations at or below it), ending with float('inf')
+        """
+        result = []
+        total = 0
+
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+
+class Metrics:
+
+    def __init__(self):
+        """
+        Registry of counters and histograms, keyed by name and labels.
+
+        Pass it as metrics= to Twitch or a chat to instrument them. Without it the instrumented code
+        only checks for None. Observers registered with add_observer() see every event as it happens,
+        for example a StatsdExporter.
+        """
+        self.counters = {}
+        self.histograms = {}
+        self.observers = []
+
+        self.__lock = threading.Lock()
+
+    def add_observer(self, observer):
+        """
+        :param observer: Function called with the kind ("counter" or "histogram"), name, value and labels dictionary
+        """
+        self.observers.append(observer)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.__lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+        for observer in self.observers:
+            observer('counter', name, value, labels)
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        """
+        :param name: Histogram name, durations should end in _seconds and sizes in _bytes
+        :param value: Observed value
+        :param buckets: Bucket bounds, used when the histogram is created
+        :param labels: Labels of the histogram
+        """
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.__lock:
+            histogram = self.histograms.get(key)
+
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+
+            histogram.observe(value)
+
+        for observer in self.observers:
+            observer('histogram', name, value, labels)
+
+    def snapshot(self):
+        """
+        :return: Tuple of copies of the counters and histograms dictionaries
+        """
+        with self.__lock:
+            histograms = {}
+
+            for key, histogram in self.histograms.items():
+                copy = histograms[key] = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.sum = histogram.sum
+                copy.count = histogram.count
+
+            return dict(self.counters), histograms
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+
+    if extra is not None:
+        items.append(extra)
+
+    if not items:
+        return ''
+
+    return '{' + ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in items) + '}'
+
+
+class PrometheusExporter:
+
+    def __init__(self, metrics, prefix='pytwitchinteract_'):
+        """
+        Renders Metrics in the Prometheus text exposition format
+
+        :param metrics: Metrics to export
+        :param prefix: Prefix of every metric name
+        """
+        self.metrics = metrics
+        self.prefix = prefix
+        self.server = None
+
+    def render(self):
+        counters, histograms = self.metrics.snapshot()
+        lines = []
+        typed = set()
+
+        for (name, labels), value in sorted(counters.items()):
+            name = self.prefix + name
+
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE {} counter'.format(name))
+
+            lines.append('{}{} {}'.format(name, _format_labels(labels), value))
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            name = self.prefix + name
+
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE {} histogram'.format(name))
+
+            for bound, count in histogram.cumulative():
+                lines.append('{}_bucket{} {}'.format(name, _format_labels(labels, ('le', '+Inf' if bound == float('inf') else repr(bound))), count))
+
+            lines.append('{}_sum{} {}'.format(name, _format_labels(labels), histogram.sum))
+            lines.append('{}_count{} {}'.format(name, _format_labels(labels), histogram.count))
+
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9100, host=''):
+        """
+        Serve the metrics over HTTP on a background thread, for Prometheus to scrape
+
+        :return: The HTTPServer
+        """
+        import http.server
+
+        exporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = exporter.render().encode('UTF-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        return self.server
+
+
+class StatsdExporter:
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='pytwitchinteract', dogstatsd=False, flush_interval=1, max_packet=1400):
+        """
+        Observer sending every event to a statsd daemon over UDP, batched into packets.
+        Register it with Metrics.add_observer().
+
+        :param host: statsd host
+        :param port: statsd port
+        :param prefix: Prefix of every metric name
+        :param dogstatsd: Send labels as DogStatsD tags, otherwise they are appended to the name
+        :param flush_interval: Maximum seconds events are buffered for
+        :param max_packet: Maximum bytes per UDP packet
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.dogstatsd = dogstatsd
+        self.flush_interval = flush_interval
+        self.max_packet = max_packet
+
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__buffer = []
+        self.__size = 0
+        self.__flushed = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def format(self, kind, name, value, labels):
+        if kind == 'counter':
+            suffix = 'c'
+        elif name.endswith('_seconds'):
+            name = name[:-8] + '_ms'
+            value = value * 1000
+            suffix = 'ms'
+        else:
+            suffix = 'h'
+
+        if self.dogstatsd:
+            tags = '|#' + ','.join('{}:{}'.format(key, label) for key, label in sorted(labels.items())) if labels else ''
+            return '{}.{}:{:g}|{}{}'.format(self.prefix, name, value, suffix, tags)
+
+        parts = [self.prefix, name] + [str(label).strip('/').replace('/', '_').replace('.', '_') or 'none' for _, label in sorted(labels.items())]
+        return '{}:{:g}|{}'.format('.'.join(parts), value, suffix)
+
+    def __call__(self, kind, name, value, labels):
+        line = self.format(kind, name, value, labels)
+
+        with self.__lock:
+            if self.__size + len(line) + 1 > self.max_packet:
+                self.__flush()
+
+            self.__buffer.append(line)
+            self.__size += len(line) + 1
+
+            if time.monotonic() - self.__flushed >= self.flush_interval:
+                self.__flush()
+
+    def __flush(self):
+        if self.__buffer:
+            try:
+                self.__socket.sendto('\n'.join(self.__buffer).encode('UTF-8'), self.address)
+            except OSError:
+                # Metrics are best effort
+                pass
+
+        self.__buffer = []
+        self.__size = 0
+        self.__flushed = time.monotonic()
+
+    def flush(self):
+        with self.__lock:
+            self.__flush()
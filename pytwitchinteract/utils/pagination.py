@@ -1,15 +1,29 @@
-import json
+from pytwitchinteract.utils.columnar import COLUMNS
+
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 
 
 class PaginatedResponse:
 
     def __init__(self, data, endpoint, query, mapping, twitch):
-        self.data = twitch.process_array(data['data'], mapping)
-        self.cursor = data['pagination']['cursor']
+        self.rows = data['data']
+        self.cursor = data.get('pagination', {}).get('cursor')
         self.endpoint = endpoint
         self.query = query
         self.mapping = mapping
         self.twitch = twitch
+        self.__data = None
+
+    @property
+    def data(self):
+        """
+        :return: Array of mapping objects of this page, created on first access
+        """
+        if self.__data is None:
+            self.__data = self.twitch.process_array(self.rows, self.mapping)
+
+        return self.__data
 
     def next(self):
         new_query = self.query.copy()
@@ -22,12 +36,157 @@ class PaginatedResponse:
         return self.__re_request(new_query)
 
     def __re_request(self, new_query):
-        response = self.twitch.do_request(self.endpoint, query=new_query)
+        return self.twitch._fetch(self.endpoint, new_query, lambda data: PaginatedResponse(data, self.endpoint, self.query, self.mapping, self.twitch))
+
+    def __fetch_page(self, cursor):
+        new_query = self.query.copy()
+        new_query['after'] = cursor
+        return self.twitch._fetch(self.endpoint, new_query, lambda data: data)
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self, limit=None, stop=None, prefetch=False):
+        """
+        Lazily iterate the objects of this and all following pages.
+        Only the current (and the prefetched) page are held in memory.
+
+        :param limit: Maximum amount of objects to return
+        :param stop: Function called with every object, iteration ends before the first object it returns True for
+        :param prefetch: Request the next page on a background thread while the current one is consumed
+
+        :return: Generator of mapping objects
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        rows = self.rows
+        cursor = self.cursor
+        objects = self.__data
+        count = 0
+
+        try:
+            while limit is None or count < limit:
+                upcoming = None
+
+                if executor is not None and cursor and rows and (limit is None or count + len(rows) < limit):
+                    upcoming = executor.submit(self.__fetch_page, cursor)
+
+                if objects is None:
+                    objects = self.twitch.process_array(rows, self.mapping)
+
+                for obj in objects:
+                    if stop is not None and stop(obj):
+                        return
+
+                    yield obj
+                    count += 1
+
+                    if limit is not None and count >= limit:
+                        return
+
+                if not cursor or not rows:
+                    return
+
+                data = upcoming.result() if upcoming is not None else self.__fetch_page(cursor)
+                rows = data['data']
+                cursor = data.get('pagination', {}).get('cursor')
+                objects = None
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_pages(self, max_pages=None, prefetch=False):
+        """
+        Iterate the raw rows of this and all following pages
+
+        :param max_pages: Maximum amount of pages to return
+        :param prefetch: Request the next page on a background thread while the current one is consumed
+
+        :return: Generator of lists of decoded rows
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        rows = self.rows
+        cursor = self.cursor
+        pages = 0
+
+        try:
+            while max_pages is None or pages < max_pages:
+                pages += 1
+                upcoming = None
+
+                if executor is not None and cursor and rows and (max_pages is None or pages < max_pages):
+                    upcoming = executor.submit(self.__fetch_page, cursor)
+
+                yield rows
+
+                if not cursor or not rows:
+                    return
+
+                data = upcoming.result() if upcoming is not None else self.__fetch_page(cursor)
+                rows = data['data']
+                cursor = data.get('pagination', {}).get('cursor')
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def to_columns(self, max_pages=None, prefetch=False):
+        """
+        Accumulate this and all following pages into typed columns, without creating model objects
+
+        :param max_pages: Maximum amount of pages to fetch
+        :param prefetch: Request the next page on a background thread while the current one is processed
+
+        :return: StreamColumns, VideoColumns or FollowColumns
+        """
+        if self.mapping not in COLUMNS:
+            raise Exception("No columnar representation of {}".format(self.mapping.__name__))
+
+        columns = COLUMNS[self.mapping]()
+
+        for rows in self.iter_pages(max_pages, prefetch):
+            columns.extend(rows)
+
+        return columns
+
+    def __aiter__(self):
+        return self.aiterate()
+
+    async def aiterate(self, limit=None, stop=None, prefetch=False):
+        """
+        Lazily iterate the objects of this and all following pages, for AsyncTwitch responses
+
+        :param limit: Maximum amount of objects to return
+        :param stop: Function called with every object, iteration ends before the first object it returns True for
+        :param prefetch: Request the next page as a task while the current one is consumed
+
+        :return: Async generator of mapping objects
+        """
+        rows = self.rows
+        cursor = self.cursor
+        count = 0
+        upcoming = None
+
+        try:
+            while limit is None or count < limit:
+                if prefetch and cursor and rows and (limit is None or count + len(rows) < limit):
+                    upcoming = asyncio.ensure_future(self.__fetch_page(cursor))
+
+                for obj in self.twitch.process_array(rows, self.mapping):
+                    if stop is not None and stop(obj):
+                        return
+
+                    yield obj
+                    count += 1
 
-        data = response.read()
-        data = json.loads(data)
+                    if limit is not None and count >= limit:
+                        return
 
-        if response.status < 200 or response.status > 299:
-            raise Exception(data['message'])
+                if not cursor or not rows:
+                    return
 
-        return PaginatedResponse(data, self.endpoint, self.query, self.mapping, self.twitch)
+                data = await upcoming if upcoming is not None else await self.__fetch_page(cursor)
+                upcoming = None
+                rows = data['data']
+                cursor = data.get('pagination', {}).get('cursor')
+        finally:
+            if upcoming is not None:
+                upcoming.cancel()
@@ -0,0 +1,144 @@
+from itertools import count
+import heapq
+import threading
+import time
+
+
+class RateLimiter:
+
+    def __init__(self, limit=800, window=60):
+        """
+        Token bucket shared by all requests of a Twitch instance.
+        The bucket size and remaining budget are learned from the Ratelimit-* response headers.
+
+        :param limit: Initial bucket size, until the first response reports the real one
+        :param window: Seconds it takes for an empty bucket to refill
+        """
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self.__updated = time.monotonic()
+        self.__reset_at = None
+        self.__waiters = []
+        self.__sequence = count()
+        self.__condition = threading.Condition()
+
+    def __refill(self, now):
+        if self.__reset_at is not None and now >= self.__reset_at:
+            self.tokens = float(self.limit)
+            self.__reset_at = None
+
+        self.tokens = min(float(self.limit), self.tokens + (now - self.__updated) * self.limit / self.window)
+        self.__updated = now
+
+    def __delay(self, now):
+        delay = (1 - self.tokens) * self.window / self.limit
+
+        if self.__reset_at is not None:
+            delay = min(delay, self.__reset_at - now)
+
+        return max(delay, 0.001)
+
+    def __record(self, waited):
+        self.acquired += 1
+
+        if waited > 0:
+            self.waited += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def acquire(self, priority=0):
+        """
+        Take a token, blocking until one is available.
+        Waiting callers are served by descending priority, then in order of arrival.
+
+        :param priority: Priority of the request
+        """
+        start = time.monotonic()
+        blocked = False
+
+        with self.__condition:
+            entry = (-priority, next(self.__sequence))
+            heapq.heappush(self.__waiters, entry)
+
+            while True:
+                now = time.monotonic()
+                self.__refill(now)
+
+                if self.__waiters[0] == entry and self.tokens >= 1:
+                    heapq.heappop(self.__waiters)
+                    self.tokens -= 1
+                    self.__record(now - start if blocked else 0)
+                    self.__condition.notify_all()
+                    return
+
+                blocked = True
+                self.__condition.wait(self.__delay(now))
+
+    def try_acquire(self):
+        """
+        Take a token without blocking
+
+        :return: 0 if a token was taken, otherwise the seconds to wait before trying again
+        """
+        with self.__condition:
+            now = time.monotonic()
+            self.__refill(now)
+
+            if len(self.__waiters) == 0 and self.tokens >= 1:
+                self.tokens -= 1
+                self.__record(0)
+                return 0
+
+            return self.__delay(now)
+
+    def update(self, headers):
+        """
+        Learn the budget from the Ratelimit-Limit, Ratelimit-Remaining and Ratelimit-Reset headers
+
+        :param headers: Response headers
+        """
+        limit = headers.get('Ratelimit-Limit')
+        remaining = headers.get('Ratelimit-Remaining')
+        reset = headers.get('Ratelimit-Reset')
+
+        if limit is None and remaining is None:
+            return
+
+        with self.__condition:
+            now = time.monotonic()
+            self.__refill(now)
+
+            if limit is not None:
+                self.limit = int(limit)
+
+            if remaining is not None:
+                # Other requests may still be in flight, so never raise the local budget
+                self.tokens = min(self.tokens, float(remaining))
+
+            if reset is not None:
+                self.__reset_at = now + max(int(reset) - time.time(), 0)
+
+            self.__condition.notify_all()
+
+    def stats(self):
+        """
+        :return: Dictionary of limiter metrics
+        """
+        with self.__condition:
+            return {
+                'limit': self.limit,
+                'tokens': self.tokens,
+                'queue_depth': len(self.__waiters),
+                'acquired': self.acquired,
+                'waited': self.waited,
+                'total_wait': self.total_wait,
+                'max_wait': self.max_wait,
+                'average_wait': self.total_wait / self.waited if self.waited > 0 else 0.0
+            }
@@ -0,0 +1,213 @@
+from pytwitchinteract.utils.connectionpool import BufferedResponse
+
+import asyncio
+import base64
+import http.client
+import json
+import random
+import threading
+import time
+
+
+# Request headers which are never written to a recording
+SECRET_HEADERS = ('authorization', 'client-id')
+
+
+def _encode_body(body):
+    if body is None:
+        return None
+
+    if isinstance(body, str):
+        return {'text': body}
+
+    try:
+        return {'text': body.decode('UTF-8')}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(body).decode('ascii')}
+
+
+def _decode_body(body):
+    if body is None:
+        return b''
+
+    if 'text' in body:
+        return body['text'].encode('UTF-8')
+
+    return base64.b64decode(body['base64'])
+
+
+def _build_headers(items):
+    headers = http.client.HTTPMessage()
+
+    for name, value in items:
+        headers[name] = value
+
+    return headers
+
+
+class RecordingTransport:
+
+    def __init__(self, transport, path):
+        """
+        Transport passing requests on to another transport and appending every exchange to a JSON lines file.
+        Authorization headers are not recorded.
+
+        A transport is anything with request(method, url, body, headers) returning a BufferedResponse,
+        close(), stats() and a size attribute, like ConnectionPool.
+
+        :param transport: Transport performing the requests
+        :param path: File the exchanges are appended to
+        """
+        self.transport = transport
+        self.path = path
+        self.size = transport.size
+        self.recorded = 0
+
+        self.__lock = threading.Lock()
+        self.__file = open(path, 'a', encoding='UTF-8')
+
+    def _record(self, method, url, body, headers, response, elapsed):
+        record = {
+            'method': method,
+            'url': url,
+            'request_headers': {name: value for name, value in headers.items() if name.lower() not in SECRET_HEADERS},
+            'request_body': _encode_body(body),
+            'status': response.status,
+            'reason': response.reason,
+            'headers': response.getheaders(),
+            'body': _encode_body(response.body),
+            'wire_size': response.wire_size,
+            'elapsed': elapsed
+        }
+
+        line = json.dumps(record) + '\n'
+
+        with self.__lock:
+            self.__file.write(line)
+            self.__file.flush()
+            self.recorded += 1
+
+    def request(self, method, url, body=None, headers=None):
+        start = time.perf_counter()
+        response = self.transport.request(method, url, body, headers)
+        self._record(method, url, body, headers or {}, response, time.perf_counter() - start)
+
+        return response
+
+    def close(self):
+        self.transport.close()
+
+        with self.__lock:
+            self.__file.close()
+
+    def stats(self):
+        stats = dict(self.transport.stats())
+        stats['recorded'] = self.recorded
+
+        return stats
+
+
+class ReplayTransport:
+
+    def __init__(self, path, latency=0, jitter=0, size=10, strict=True):
+        """
+        Transport serving recorded responses back without touching the network.
+
+        Exchanges are looked up by method and URL. Exchanges recorded more than once
+        are replayed in recorded order, starting over once all were served.
+
+        :param path: JSON lines file written by RecordingTransport
+        :param latency: Seconds every response is delayed by
+        :param jitter: Maximum seconds randomly added to the latency
+        :param size: Reported pool size, bounding the concurrency of fan_out
+        :param strict: Raise for requests which were never recorded, instead of answering 404
+        """
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.size = size
+        self.strict = strict
+
+        self.requests = 0
+        self.misses = 0
+
+        self.__exchanges = {}
+        self.__positions = {}
+        self.__lock = threading.Lock()
+
+        with open(path, encoding='UTF-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.__exchanges.setdefault((record['method'], record['url']), []).append(record)
+
+    def _respond(self, method, url):
+        with self.__lock:
+            self.requests += 1
+            exchanges = self.__exchanges.get((method, url))
+
+            if exchanges is None:
+                self.misses += 1
+
+                if self.strict:
+                    raise KeyError("No recorded response for {} {}".format(method, url))
+
+                body = json.dumps({'error': 'Not Found', 'status': 404, 'message': 'Not recorded'}).encode('UTF-8')
+                return BufferedResponse(404, 'Not Found', _build_headers([]), body)
+
+            position = self.__positions.get((method, url), 0)
+            self.__positions[(method, url)] = (position + 1) % len(exchanges)
+            record = exchanges[position]
+
+        body = _decode_body(record['body'])
+
+        return BufferedResponse(record['status'], record['reason'], _build_headers(record['headers']), body, record.get('wire_size'))
+
+    def _delay(self):
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter > 0 else 0)
+
+    def request(self, method, url, body=None, headers=None):
+        delay = self._delay()
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return self._respond(method, url)
+
+    def close(self):
+        pass
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'size': self.size,
+                'requests': self.requests,
+                'misses': self.misses
+            }
+
+
+class AsyncRecordingTransport(RecordingTransport):
+    """
+    RecordingTransport for AsyncTwitch, wrapping an AsyncConnectionPool
+    """
+
+    async def request(self, method, url, body=None, headers=None):
+        start = time.perf_counter()
+        response = await self.transport.request(method, url, body, headers)
+        self._record(method, url, body, headers or {}, response, time.perf_counter() - start)
+
+        return response
+
+
+class AsyncReplayTransport(ReplayTransport):
+    """
+    ReplayTransport for AsyncTwitch, delaying responses without blocking the event loop
+    """
+
+    async def request(self, method, url, body=None, headers=None):
+        delay = self._delay()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        return self._respond(method, url)
@@ -0,0 +1,242 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class StreamEvent:
+
+    def __init__(self, user_id, stream, previous):
+        """
+        :param user_id: ID of the user who is streaming
+        :param stream: Current Stream, or None if the stream went offline
+        :param previous: Previously seen Stream, or None if the stream just went live
+        """
+        self.user_id = user_id
+        self.stream = stream
+        self.previous = previous
+
+    def __repr__(self):
+        return "{}(user_id={!r})".format(type(self).__name__, self.user_id)
+
+
+class StreamOnline(StreamEvent):
+    pass
+
+
+class StreamOffline(StreamEvent):
+    pass
+
+
+class GameChanged(StreamEvent):
+    pass
+
+
+class TitleChanged(StreamEvent):
+    pass
+
+
+class ViewerThreshold(StreamEvent):
+
+    def __init__(self, user_id, stream, previous, threshold, rising):
+        """
+        :param threshold: Viewer count which was crossed
+        :param rising: True if the viewer count rose above the threshold, False if it fell below it
+        """
+        StreamEvent.__init__(self, user_id, stream, previous)
+        self.threshold = threshold
+        self.rising = rising
+
+
+class StreamWatcher:
+
+    def __init__(self, twitch, user_ids=None, game_id=None, language=None, thresholds=None, offline_after=2, min_interval=30, max_interval=300):
+        """
+        Polls get_streams and emits events for the differences between polls.
+
+        Either watches specific channels (user_ids), which are polled adaptively:
+        channels which just changed are polled every min_interval, quiet ones back off up to max_interval.
+        Or watches all streams matching game_id/language, walking every page each min_interval.
+
+        :param twitch: Twitch API instance
+        :param user_ids: User IDs of the channels to watch, as strings or integers
+        :param game_id: Watch all streams of these game IDs
+        :param language: Watch all streams of these languages
+        :param thresholds: Viewer counts to emit ViewerThreshold events for
+        :param offline_after: Consecutive polls a stream has to be missing from before it is considered offline.
+            Protects against streams missing from a page as viewers join and leave.
+        :param min_interval: Seconds between polls of hot channels, or of the whole query
+        :param max_interval: Maximum seconds between polls of quiet channels
+        """
+        self.twitch = twitch
+        self.game_id = game_id
+        self.language = language
+        self.thresholds = sorted(thresholds or [])
+        self.offline_after = offline_after
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.running = False
+
+        # Live streams by user ID
+        self.streams = {}
+
+        # Helix returns user IDs as strings
+        self.__watched = list(dict.fromkeys(str(user_id) for user_id in user_ids)) if user_ids is not None else None
+        self.__missing = {}
+        self.__intervals = {}
+        self.__next_poll = {}
+        self.__listeners = {}
+
+    def on(self, event_type, callback):
+        """
+        :param event_type: StreamEvent subclass, or StreamEvent for all events
+        :param callback: Function called with the event
+        """
+        self.__listeners.setdefault(event_type, []).append(callback)
+
+    def __due(self, now):
+        if self.__watched is None:
+            return None
+
+        return [user_id for user_id in self.__watched if self.__next_poll.get(user_id, 0) <= now]
+
+    def __fetch(self, due):
+        seen = {}
+
+        if due is None:
+            pages = [self.twitch.get_streams(amount=100, game_id=self.game_id, language=self.language)]
+        else:
+            pages = [self.twitch.get_streams(user_id=due[start:start + 100], amount=100) for start in range(0, len(due), 100)]
+
+        for page in pages:
+            for stream in page.iterate(prefetch=due is None):
+                # Streams may be listed twice across pages, keep the first sighting
+                if stream.user_id not in seen:
+                    seen[stream.user_id] = stream
+
+        return seen
+
+    def __compare(self, user_id, stream, previous, events):
+        if previous is None:
+            events.append(StreamOnline(user_id, stream, None))
+            return
+
+        if stream.game_id != previous.game_id:
+            events.append(GameChanged(user_id, stream, previous))
+
+        if stream.title != previous.title:
+            events.append(TitleChanged(user_id, stream, previous))
+
+        for threshold in self.thresholds:
+            if previous.viewer_count < threshold <= stream.viewer_count:
+                events.append(ViewerThreshold(user_id, stream, previous, threshold, True))
+            elif stream.viewer_count < threshold <= previous.viewer_count:
+                events.append(ViewerThreshold(user_id, stream, previous, threshold, False))
+
+    def poll(self):
+        """
+        Poll the due channels (or the whole query) once and emit the resulting events
+
+        :return: List of StreamEvent
+        """
+        now = time.monotonic()
+        due = self.__due(now)
+
+        if due is not None and len(due) == 0:
+            return []
+
+        seen = self.__fetch(due)
+        events = []
+        changed = set()
+
+        for user_id, stream in seen.items():
+            count = len(events)
+            self.__missing.pop(user_id, None)
+            self.__compare(user_id, stream, self.streams.get(user_id), events)
+            self.streams[user_id] = stream
+
+            if len(events) > count:
+                changed.add(user_id)
+
+        # Only the streams which were not returned can go offline, a set difference instead of a walk over every stream
+        if due is None:
+            absent = self.streams.keys() - seen.keys()
+        else:
+            absent = [user_id for user_id in due if user_id not in seen and user_id in self.streams]
+
+        for user_id in absent:
+            misses = self.__missing.get(user_id, 0) + 1
+
+            if misses >= self.offline_after:
+                events.append(StreamOffline(user_id, None, self.streams.pop(user_id)))
+                self.__missing.pop(user_id, None)
+                changed.add(user_id)
+            else:
+                self.__missing[user_id] = misses
+
+        if due is not None:
+            self.__schedule(due, changed, now)
+
+        for event in events:
+            self.__emit(event)
+
+        return events
+
+    def __schedule(self, due, changed, now):
+        for user_id in due:
+            if user_id in changed or user_id in self.__missing:
+                interval = self.min_interval
+            else:
+                interval = min(self.__intervals.get(user_id, self.min_interval) * 2, self.max_interval)
+
+            self.__intervals[user_id] = interval
+            self.__next_poll[user_id] = now + interval
+
+    def __emit(self, event):
+        for event_type in type(event).__mro__:
+            for callback in self.__listeners.get(event_type, []):
+                # A failing listener must not lose the events of the other listeners, the streams are updated already
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("%s listener failed", type(event).__name__)
+
+    def __sleep_time(self):
+        if self.__watched is None or len(self.__next_poll) == 0:
+            return self.min_interval
+
+        return max(min(self.__next_poll.values()) - time.monotonic(), 0)
+
+    def run(self, async_=False):
+        """
+        Poll until stop() is called. Failed polls are logged and retried, backing off up to max_interval.
+
+        :param async_: Poll on a background thread
+        """
+        if async_:
+            thread = threading.Thread(target=self.run, daemon=True)
+            thread.start()
+            return
+
+        self.running = True
+        failures = 0
+
+        while self.running:
+            try:
+                self.poll()
+                failures = 0
+                delay = self.__sleep_time()
+            except Exception:
+                failures += 1
+                delay = min(max(self.min_interval, 1) * 2 ** (failures - 1), self.max_interval)
+                logger.exception("Polling streams failed, retrying in %d seconds", delay)
+
+            deadline = time.monotonic() + delay
+
+            while self.running and time.monotonic() < deadline:
+                time.sleep(min(1, max(deadline - time.monotonic(), 0)))
+
+    def stop(self):
+        self.running = False
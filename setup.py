@@ -11,6 +11,7 @@ setup(name='PyTwitchInteract',
       packages=[
           "pytwitchinteract",
           "pytwitchinteract.chat",
+          "pytwitchinteract.mock",
           "pytwitchinteract.models",
           "pytwitchinteract.utils"
       ],